@@ -0,0 +1,52 @@
+"""
+Benchmark describe_instances output with list attributes widened into instance row against child tables.
+
+Child tables mode writes Tags, BlockDeviceMappings, NetworkInterfaces... as seperate narrow
+tables keyed by InstanceId. Reports tables, widest row, csv size and time to format and write csv.
+No AWS API call is made.
+
+usage : python benchmarks/bench_child_tables.py [reservations] [instances_per_reservation]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from resource_lister.boto_formatter import service_formatter  # noqa: E402
+from bench_explode import make_page  # noqa: E402
+
+
+def measure(response, child_tables):
+    attributes = {"pagination": "True", "format_type": "csv", "output_to": "file", "child_tables": child_tables}
+    start_time = time.perf_counter()
+    file_paths = service_formatter.service_response_formatter("ec2", "describe_instances", response, attributes)
+    elapsed = time.perf_counter() - start_time
+    if not isinstance(file_paths, list):
+        file_paths = [file_paths]
+    widest = 0
+    csv_size = 0
+    for file_path in file_paths:
+        with open(file_path) as f:
+            for line in f:
+                widest = max(widest, line.count(",") + 1)
+                csv_size += len(line)
+        os.remove(file_path)
+    return len(file_paths), widest, csv_size, elapsed
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    instances_per_reservation = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    os.environ["OUTPUT_PATH"] = tempfile.mkdtemp()
+    response = [{"result": [make_page(reservations, instances_per_reservation)],
+                 "prefix_columns": {"Account": "123456789012", "Region": "us-east-1"}}]
+    print("describe_instances : {} reservations x {} instances".format(reservations, instances_per_reservation))
+    for label, child_tables in [("widened", "no"), ("child tables", "yes")]:
+        tables, widest, csv_size, elapsed = measure(response, child_tables)
+        print("{:<13}: {} tables, widest row {:4} columns, csv {:6.1f} MB, {:.2f}s".format(
+            label, tables, widest, csv_size / 1e6, elapsed))
+
+
+if __name__ == "__main__":
+    main()
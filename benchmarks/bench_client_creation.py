@@ -0,0 +1,59 @@
+"""
+Benchmark boto3 client creation with and without the shared botocore loader.
+
+Each iteration creates a new session (one per account/region task in processors)
+and creates ec2, cloudwatch and rds clients from it. No AWS API call is made.
+
+usage : python benchmarks/bench_client_creation.py [iterations]
+"""
+import os
+import sys
+import time
+import boto3
+from botocore.config import Config
+from botocore.credentials import Credentials
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from resource_lister.session_mgr.iam_session_mgr import IAMSessionManager  # noqa: E402
+
+SERVICES = ["ec2", "cloudwatch", "rds"]
+REGION = "us-east-1"
+
+
+def create_clients(session):
+    for service_name in SERVICES:
+        session.client(service_name, config=Config(region_name=REGION))
+
+
+def bench_default_sessions(iterations):
+    start_time = time.time()
+    for _ in range(iterations):
+        session = boto3.Session(aws_access_key_id="AKIDEXAMPLE",
+                                aws_secret_access_key="SECRET", aws_session_token="TOKEN")
+        create_clients(session)
+    return time.time() - start_time
+
+
+def bench_shared_loader_sessions(iterations):
+    credentials = Credentials("AKIDEXAMPLE", "SECRET", "TOKEN")
+    start_time = time.time()
+    for _ in range(iterations):
+        session = IAMSessionManager.create_session(credentials)
+        create_clients(session)
+    return time.time() - start_time
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    before = bench_default_sessions(iterations)
+    after = bench_shared_loader_sessions(iterations)
+    print("iterations : {} sessions x {} clients".format(iterations, len(SERVICES)))
+    print("new loader per session : {:.3f}s ({:.1f} ms/session)".format(
+        before, before * 1000 / iterations))
+    print("shared loader          : {:.3f}s ({:.1f} ms/session)".format(
+        after, after * 1000 / iterations))
+    print("speedup                : {:.1f}x".format(before / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark describe_instances output with one row per reservation against one row per instance.
+
+Row per reservation is previous config (result_keys Reservations, columns Instances_0_...),
+rebuilt below from current ec2 config. Row per instance is current config
+(result_keys Reservations[].Instances[] with parent fields).
+Reports rows, columns, csv size and peak memory of formatting. No AWS API call is made.
+
+usage : python benchmarks/bench_explode.py [reservations] [instances_per_reservation]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from resource_lister.boto_formatter.json_util import json_util  # noqa: E402
+from resource_lister.boto_formatter.service_config_mgr.service_config import ServiceConfig  # noqa: E402
+from bench_format_json import make_reservation  # noqa: E402
+
+PARENT_COLUMNS = ["ReservationId", "OwnerId", "RequesterId"]
+
+
+def legacy_json_config(json_config, parent_keys):
+    legacy_config = {}
+    for key, value in json_config.items():
+        if key in PARENT_COLUMNS:
+            continue
+        if key.split("_")[0] in parent_keys:
+            legacy_config[key] = value
+        else:
+            legacy_config["Instances_0_" + key] = value
+    return legacy_config
+
+
+def make_page(reservations, instances_per_reservation):
+    page = {"Reservations": []}
+    for index in range(reservations):
+        reservation = make_reservation(index)
+        instance = reservation["Instances"][0]
+        reservation["Instances"] = [dict(instance, InstanceId="{}-{}".format(instance["InstanceId"], count))
+                                    for count in range(instances_per_reservation)]
+        page["Reservations"].append(reservation)
+    return page
+
+
+def measure(json_config, result_keys, parent_keys, page, required_only):
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    rows = json_util.format_json_list(json_config, json_util.format_response_for_result_keys(
+        page, result_keys, parent_keys), required_only, {"Account": "123456789012"})
+    csv_data = json_util.get_csv_data(rows)
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    columns = len(csv_data[0].split(",")) if csv_data else 0
+    csv_size = sum(len(line) + 1 for line in csv_data)
+    return len(rows), columns, csv_size, peak, elapsed
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    instances_per_reservation = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    function_config = ServiceConfig.get_service_function_details("ec2", "describe_instances")
+    parent_keys = function_config["result_parent_keys"]
+    json_config = function_config["json_response"]
+    page = make_page(reservations, instances_per_reservation)
+    print("describe_instances : {} reservations x {} instances".format(reservations, instances_per_reservation))
+    for required_only in [True, False]:
+        for label, config, result_keys, keys in [
+                ("row per reservation", legacy_json_config(json_config, parent_keys), ["Reservations"], None),
+                ("row per instance", json_config, function_config["result_keys"], parent_keys)]:
+            rows, columns, csv_size, peak, elapsed = measure(config, result_keys, keys, page, required_only)
+            print("required_only={!s:<5} {:<20}: {:6} rows, {:6} columns, csv {:7.1f} MB, "
+                  "peak memory {:7.1f} MB, {:.2f}s".format(required_only, label, rows, columns,
+                                                          csv_size / 1e6, peak / 1e6, elapsed))
+
+
+if __name__ == "__main__":
+    main()
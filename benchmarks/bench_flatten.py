@@ -0,0 +1,83 @@
+"""
+Benchmark json_util.flatten_json on synthetic describe_instances reservations.
+
+Compares recursive flatten with string concatenation and slicing at every leaf (previous
+implementation, copied below) against current flatten, which builds each column prefix once
+per container and reuses list index names.
+Also checks that a response nested deeper than the recursion limit is flattened.
+No AWS API call is made.
+
+usage : python benchmarks/bench_flatten.py [reservations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from resource_lister.boto_formatter.json_util import json_util  # noqa: E402
+from bench_format_json import make_reservation  # noqa: E402
+
+
+def legacy_flatten_json(y):
+    out = {}
+
+    def flatten(x, name=''):
+        if type(x) is dict:
+            for a in x:
+                flatten(x[a], name + a + '_')
+        elif type(x) is list:
+            i = 0
+            for a in x:
+                flatten(a, name + str(i) + '_')
+                i += 1
+        else:
+            out[name[:-1]] = x
+
+    flatten(y)
+    return out
+
+
+def bench(func, objects, repeat=10):
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for json_object in objects:
+            func(json_object)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_deep_object(depth):
+    root = {}
+    current = root
+    for _ in range(depth):
+        current["Child"] = {}
+        current = current["Child"]
+    current["Value"] = 1
+    return root
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    objects = [make_reservation(index) for index in range(reservations)]
+    for json_object in objects[:10]:
+        assert legacy_flatten_json(json_object) == json_util.flatten_json(json_object)
+    before = bench(legacy_flatten_json, objects)
+    after = bench(json_util.flatten_json, objects)
+    print("flatten {} reservations : previous {:.3f}s, current {:.3f}s, speedup {:.1f}x".format(
+        reservations, before, after, before / after))
+
+    depth = sys.getrecursionlimit() * 2
+    deep_object = make_deep_object(depth)
+    try:
+        legacy_flatten_json(deep_object)
+        legacy_status = "ok"
+    except RecursionError:
+        legacy_status = "RecursionError"
+    columns = json_util.flatten_json(deep_object)
+    print("flatten depth {} : previous {}, current ok ({} column)".format(depth, legacy_status, len(columns)))
+
+
+if __name__ == "__main__":
+    main()
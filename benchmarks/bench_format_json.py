@@ -0,0 +1,93 @@
+"""
+Benchmark json_util.format_json_list on synthetic describe_instances reservations.
+
+Compares flatten everything with list based extras (previous implementation, copied
+below) against compiled extraction plan with set based extras.
+No AWS API call is made.
+
+usage : python benchmarks/bench_format_json.py [reservations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from resource_lister.boto_formatter.json_util import json_util  # noqa: E402
+from resource_lister.boto_formatter.service_config_mgr.service_config import ServiceConfig  # noqa: E402
+
+
+def legacy_format_json_list(json_config, json_object_list, required_only, prefix_columns=None):
+    result_json_list = []
+    json_config_keys = json_config.keys()
+    for json_object_raw in json_object_list:
+        json_object = json_util.flatten_json(json_object_raw)
+        result_row = {}
+        keys_present_list = []
+        if prefix_columns:
+            for prefix_column_header in prefix_columns.keys():
+                result_row[prefix_column_header] = prefix_columns[prefix_column_header]
+        json_object_keys = json_object.keys()
+        for json_config_key in json_config_keys:
+            if json_config_key in json_object_keys:
+                result_row[json_config_key] = str(json_object[json_config_key])
+                keys_present_list.append(json_config_key)
+            else:
+                result_row[json_config_key] = ""
+        if not required_only:
+            extra_rows = [
+                i for i in json_object_keys if i not in keys_present_list]
+            for extra_row_key in extra_rows:
+                result_row[extra_row_key] = "{}|{}".format(
+                    extra_row_key, json_object[extra_row_key])
+        result_json_list.append(result_row)
+    return result_json_list
+
+
+def make_reservation(index):
+    instance = {
+        "InstanceId": "i-{:017x}".format(index), "ImageId": "ami-12345678", "InstanceType": "m5.large",
+        "State": {"Code": 16, "Name": "running"}, "PrivateIpAddress": "10.0.0.1",
+        "Placement": {"AvailabilityZone": "us-east-1a", "Tenancy": "default"},
+        "Tags": [{"Key": "tag-{}".format(k), "Value": "value-{}".format(k)} for k in range(20)],
+        "BlockDeviceMappings": [{"DeviceName": "/dev/xvd{}".format(k),
+                                 "Ebs": {"VolumeId": "vol-{}".format(k), "Status": "attached"}}
+                                for k in range(4)],
+        "NetworkInterfaces": [{"NetworkInterfaceId": "eni-{}".format(k),
+                               "PrivateIpAddresses": [{"PrivateIpAddress": "10.0.{}.{}".format(k, j),
+                                                       "Primary": j == 0} for j in range(4)],
+                               "Groups": [{"GroupId": "sg-{}".format(j), "GroupName": "sg"} for j in range(3)]}
+                              for k in range(2)],
+    }
+    return {"ReservationId": "r-{}".format(index), "OwnerId": "123456789012", "Groups": [],
+            "Instances": [instance]}
+
+
+def bench(func, plan_args, json_config, objects, required_only, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func(json_config, objects, required_only, {"Account": "123456789012"}, *plan_args)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    function_config = ServiceConfig.get_service_function_details("ec2", "describe_instances")
+    json_config = function_config["json_response"]
+    plan = function_config["extraction_plan"]
+    # Rows are instances exploded from reservations
+    objects = json_util.format_response_for_result_keys(
+        {"Reservations": [make_reservation(index) for index in range(reservations)]},
+        function_config["result_keys"], function_config.get("result_parent_keys"))
+    print("describe_instances : {} instances, {} reference keys".format(len(objects), len(json_config)))
+    for required_only in [True, False]:
+        before = bench(legacy_format_json_list, [], json_config, objects, required_only)
+        after = bench(json_util.format_json_list, [plan], json_config, objects, required_only)
+        print("required_only={!s:<5} : flatten all {:.3f}s, extraction plan {:.3f}s, speedup {:.1f}x".format(
+            required_only, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Count CloudWatch API calls of _metric_processor for a synthetic organization.
+
+Previous engine discovered at most 60 resources and made one get_metric_statistics call per
+resource x account x region. GetMetricData engine streams all discovered resources into
+requests of up to 500 metric queries, sent only to home account x region of each resource.
+RESOURCE_LISTER_METRIC_RESOURCE_LIMIT caps resources per run. Later metric options reuse
+discovered ids from DiscoveryCache, and a multi metric option fetches all EC2 metrics in same
+requests of one pass.
+Discovery and CloudWatch clients are replaced with in-memory fakes, no AWS API call is made.
+
+usage : python benchmarks/bench_metric_calls.py [accounts] [regions] [instances]
+"""
+import os
+import sys
+import datetime
+import collections
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import resource_lister.processor._metric_processor as metric_processor  # noqa: E402
+
+calls = collections.Counter()
+METRIC_NAMES = ["NetworkIn", "NetworkOut", "NetworkPacketsIn", "NetworkPacketsOut"]
+
+
+class FakeCloudWatch():
+    def get_metric_data(self, **kwargs):
+        calls["get_metric_data"] += 1
+        return {"MetricDataResults": [{"Id": query["Id"], "Timestamps": [datetime.datetime(2024, 1, 1)],
+                                       "Values": [1.0]} for query in kwargs["MetricDataQueries"]]}
+
+
+def main():
+    account_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    region_count = int(sys.argv[2]) if len(sys.argv) > 2 else 17
+    instance_count = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    accounts = ["{:012d}".format(index) for index in range(account_count)]
+    regions = ["region-{}".format(index) for index in range(region_count)]
+    metric_processor.ClientPool.get_client = classmethod(lambda cls, *args: FakeCloudWatch())
+    metric_processor.AccountRegions.get_account_region_map = classmethod(
+        lambda cls, accounts, regions: {account: regions for account in accounts})
+    # Instances spread over account x region, discovery yields ids of its location
+    locations = [(account, region) for account in accounts for region in regions]
+    location_instances = dict()
+    for index in range(instance_count):
+        location_instances.setdefault(locations[index % len(locations)], []).append("i-{}".format(index))
+
+    def fetch_instance_ids(account, region):
+        calls["discovery"] += 1
+        return iter(location_instances.get((account, region), []))
+
+    output_results = metric_processor.process_metrics(
+        accounts, regions, fetch_instance_ids, "cloudwatch", [("CPUUtilization", ["CPUUtilization"])], "InstanceId",
+        {"Namespace": "AWS/EC2", "Period": 300, "Statistics": ["Average"]},
+        "01/01/2024", metric_processor.ResourceLimit(metric_processor.get_resource_limit()))
+    object_list = output_results.get("CPUUtilization", [])
+    previous_calls = min(instance_count, 60) * account_count * region_count
+    print("{} instances, {} accounts x {} regions : get_metric_statistics {} calls for first 60 instances, "
+          "get_metric_data {} calls, {} instances with datapoints".format(
+              instance_count, account_count, region_count, previous_calls, calls["get_metric_data"], len(object_list)))
+    # Other EC2 metric options of same run reuse discovery
+    for metric_name in METRIC_NAMES:
+        metric_processor.process_metrics(
+            accounts, regions, fetch_instance_ids, "cloudwatch", [(metric_name, [metric_name])], "InstanceId",
+            {"Namespace": "AWS/EC2", "Period": 300, "Statistics": ["Average"]},
+            "01/01/2024")
+    separate_calls = calls["get_metric_data"]
+    print("{} EC2 metric options : {} discovery calls for {} account x region".format(
+        len(METRIC_NAMES) + 1, calls["discovery"], len(locations)))
+    # Same metrics from multi metric option, one wide output
+    metric_parameters = {"Namespace": "AWS/EC2", "MetricNames": ["CPUUtilization"] + METRIC_NAMES,
+                         "Period": 300, "Statistics": ["Average"]}
+    metric_processor.DiscoveryCache.clear()
+    calls.clear()
+    output_results = metric_processor.process_metrics(
+        accounts, regions, fetch_instance_ids, "cloudwatch",
+        metric_processor.get_metric_outputs("ec2_metrics", metric_parameters), "InstanceId",
+        metric_parameters, "01/01/2024")
+    print("{} EC2 metrics : separate options {} get_metric_data calls, one pass {} calls, "
+          "{} instances with datapoints".format(len(METRIC_NAMES) + 1, separate_calls,
+                                                calls["get_metric_data"],
+                                                len(output_results.get("ec2_metrics", []))))
+
+
+if __name__ == "__main__":
+    main()
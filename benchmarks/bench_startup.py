@@ -0,0 +1,82 @@
+"""
+Benchmark CLI startup and enforce import time budget.
+
+Runs `python -X importtime` on the CLI entry modules in a fresh interpreter and sums
+cumulative time of top level imports. Then checks that parsing arguments, looking up a
+service menu and printing configuration don't import boto3 or processors.
+Exit code is 1 if budget is exceeded or a deferred module was imported.
+
+usage : python benchmarks/bench_startup.py [budget_ms]
+"""
+import os
+import sys
+import subprocess
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+DEFAULT_BUDGET_MS = 150
+ENTRY_MODULES = ["resource_lister.main", "resource_lister.menu.menu_processor"]
+DEFERRED_MODULES = ["boto3", "botocore", "resource_lister.processor.core_processor",
+                    "resource_lister.session_mgr.iam_session_mgr"]
+
+STARTUP_SCRIPT = '''
+import sys
+from resource_lister.menu import menu_processor, menu_util
+sys.argv = ["resource_lister", "--service", "ec2", "--option", "1-15", "--accounts", "ALL", "--output", "print"]
+args = menu_processor.setup_args()
+menu_util.MenuData().search_menu_data(args.service[0])
+menu_util.MenuData.get_attributes()
+print(",".join(name for name in {} if name in sys.modules))
+'''.format(DEFERRED_MODULES)
+
+
+def get_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([SRC_PATH, env.get("PYTHONPATH", "")])
+    return env
+
+
+def import_time_us(module_name):
+    """
+    :return: cumulative import time in microseconds of top level imports
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {}".format(module_name)],
+                            capture_output=True, text=True, env=get_env(), check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented, their time is already part of parent
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total
+
+
+def loaded_deferred_modules():
+    result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT],
+                            capture_output=True, text=True, env=get_env(), check=True)
+    output = result.stdout.strip().splitlines()
+    return [name for name in output[-1].split(",") if name] if output else []
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    failed = False
+    for module_name in ENTRY_MODULES:
+        elapsed_ms = import_time_us(module_name) / 1000
+        status = "OK" if elapsed_ms <= budget_ms else "OVER BUDGET"
+        failed = failed or elapsed_ms > budget_ms
+        print("import {:<40} : {:7.1f} ms (budget {} ms) {}".format(
+            module_name, elapsed_ms, budget_ms, status))
+    print("import {:<40} : {:7.1f} ms (for reference)".format("boto3", import_time_us("boto3") / 1000))
+    loaded = loaded_deferred_modules()
+    if loaded:
+        failed = True
+        print("startup imported deferred modules : {}".format(", ".join(loaded)))
+    else:
+        print("startup imported deferred modules : none")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import json
 import subprocess
+import concurrent.futures
 import logging
+import resource_lister
+from resource_lister.api import STATUS_SUCCESS, get_option_concurrency
 
 # Set up logging
 logger = logging.getLogger()
@@ -8,27 +11,16 @@ logger.setLevel(logging.ERROR)
 
 def execute_resource_lister(config):
     logger.info(f"execute_resource_lister called with config: {config}")
-    
-    command = [
-        "resource_lister",
-        "--service", config['service'],
-        "--option", str(config['option']),
-        "--accounts", config['accounts'],
-        "--regions", config['regions'],
-        "--output", config['output']
-    ]
-    
-    logger.info(f"Executing command: {command}")
-    
+    # Options run in this interpreter and share sessions and clients across
+    # options and warm invocations, instead of one resource_lister process per option
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        logger.info(f"Command executed successfully. stdout length: {len(result.stdout)}")
-        logger.info(f"stdout preview: {result.stdout[:200]}...")
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to execute resource_lister for {config['service']}: {e}")
-        logger.error(f"Error output: {e.stderr}")
-        logger.error(f"Return code: {e.returncode}")
+        result = resource_lister.run(config['service'], [config['option']],
+                                     accounts=config['accounts'], regions=config['regions'],
+                                     output=config['output'])
+        status = result[str(config['option'])]
+        logger.info(f"resource_lister {config['service']} option {config['option']} : {status}")
+        if status == STATUS_SUCCESS:
+            return status
         return None
     except Exception as e:
         logger.error(f"Unexpected error in execute_resource_lister: {e}")
@@ -61,20 +53,111 @@ def generate_commands(service, option='1'):
     logger.info(f"generate_commands called with service={service}, option={option}, returning: {config}")
     return config
 
+# Services whose listed options each get a result "<service>_<option>"
+SERVICE_OPTIONS = {
+    'ec2': range(1, 16),
+    'cloudfront': range(1, 3),
+    'cloudwatch': range(1, 3),
+    'lambda': range(1, 3),
+    'sns': range(1, 3),
+    'eks': [2],
+    'emr': range(1, 4),
+    'rds': range(1, 6),
+    'sagemaker': range(1, 6),
+}
+
+# Metric services mapped to cloudwatch options, result key is the metric service
+METRIC_OPTIONS = {
+    'CPUUtilization': ['3'],
+    'mem_used_percent': ['4'],
+    'network_in': ['5'],
+    'network_out': ['6'],
+    'network_packets_in': ['7'],
+    'network_packets_out': ['8'],
+    'VolumeIOPS': ['9', '10'],
+    'VolumeThroughput': ['11', '12'],
+    'CPUReservation': ['13'],
+    'MemoryReservation': ['14'],
+    'rds_cpu_utilization': ['15'],
+    'rds_database_connections': ['16'],
+    'rds_freeable_memory': ['17'],
+    'rds_free_storage_space': ['18'],
+    'rds_read_iops': ['19'],
+    'rds_write_iops': ['20'],
+    'rds_read_throughput': ['21'],
+    'rds_write_throughput': ['22'],
+    'rds_replica_lag': ['23'],
+    'rds_aurora_capacity_units': ['24'],
+    'ec2_metrics': ['25'],
+    'ebs_metrics': ['26'],
+    'ecs_metrics': ['27'],
+    'rds_metrics': ['28'],
+}
+
+# Services run with their first option only
+SINGLE_OPTION_SERVICES = ['s3', 'ecs', 'cloudformation', 'cloudtrail', 'codecommit', 'dynamodb', 'efs',
+                          'elbv2', 'emr-serverless', 'redshift', 'sqs', 'ssm', 'organizations']
+
+
+def get_supported_services():
+    """
+    :return: services accepted in event, built from option maps so new options are accepted
+    """
+    return SINGLE_OPTION_SERVICES + list(SERVICE_OPTIONS) + list(METRIC_OPTIONS) + ['carbon_footprint']
+
+
+def get_option_jobs(service):
+    """
+    :return: list of (result key, resource_lister service, option), service None runs ccft_access
+    """
+    jobs = []
+    if service in SERVICE_OPTIONS:
+        for i in SERVICE_OPTIONS[service]:
+            jobs.append((f'{service}_{i}', service, str(i)))
+        if service == 'ec2':
+            jobs.append(('carbon_footprint', None, None))
+    elif service in METRIC_OPTIONS:
+        options = METRIC_OPTIONS[service]
+        for option in options:
+            result_key = service if len(options) == 1 else f'{service}_{option}'
+            jobs.append((result_key, 'cloudwatch', option))
+    elif service == 'carbon_footprint':
+        jobs.append((service, None, None))
+    else:
+        jobs.append((service, service, '1'))
+    return jobs
+
+
+def run_option_job(service, option):
+    if service is None:
+        return execute_ccft_access()
+    return execute_resource_lister(generate_commands(service, option))
+
+
+def run_option_jobs(jobs):
+    """
+    Run options concurrently, at most RESOURCE_LISTER_OPTION_CONCURRENCY at a time
+    Options share sessions, clients and the account x region worker pool
+    :return: results dictionary in job order
+    """
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=get_option_concurrency()) as executor:
+        futures = [executor.submit(run_option_job, service, option) for _, service, option in jobs]
+        for (result_key, _, _), future in zip(jobs, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Unexpected error for {result_key}: {e}")
+                result = None
+            results[result_key] = result if result else "Failed to execute"
+    return results
+
+
 def lambda_handler(event, context):
     logger.info(f"lambda_handler called with event: {event}")
     logger.info(f"context: {context}")
     
-    services = ['s3', 'ec2', 'ecs', 'cloudformation', 'cloudfront', 
-                'cloudtrail', 'cloudwatch', 'codecommit', 'dynamodb', 'efs', 'eks', 'elbv2', 
-                'emr', 'emr-serverless', 'lambda', 'rds', 'redshift', 
-                'sagemaker', 'sns', 'sqs', 'ssm', 'organizations', 'CPUUtilization', 'mem_used_percent',
-                'network_in', 'network_out', 'network_packets_in', 'network_packets_out', 'VolumeIOPS', 'VolumeThroughput', 'carbon_footprint', 
-                'CPUReservation', 'MemoryReservation', 'rds_read_throughput', 'rds_write_throughput',
-                'rds_replica_lag', 'rds_aurora_capacity_units', 'rds_cpu_utilization', 
-                'rds_freeable_memory', 'rds_database_connections', 'rds_free_storage_space',
-                'rds_read_iops', 'rds_write_iops']
-    
+    services = get_supported_services()
     logger.info(f"Supported services: {services}")
     
     # Extract the service name from the event
@@ -97,133 +180,9 @@ def lambda_handler(event, context):
     
     logger.info(f"Service {service} is supported, proceeding with processing")
     
-    results = {}
-    
-    if service == 'ec2':
-        logger.info("Processing EC2 service")
-        for i in range(1, 16):
-            logger.info(f"Processing EC2 option {i}")
-            result = execute_resource_lister(generate_commands(service, str(i)))
-            results[f'{service}_{i}'] = result if result else "Failed to execute"
-        
-        logger.info("Executing ccft_access for carbon footprint")
-        result = execute_ccft_access()
-        results['carbon_footprint'] = result if result else "Failed to execute"
-        
-    elif service in ['cloudfront', 'cloudwatch', 'lambda', 'sns']:
-        logger.info(f"Processing {service} service (options 1-2)")
-        for i in range(1, 3):
-            logger.info(f"Processing {service} option {i}")
-            result = execute_resource_lister(generate_commands(service, str(i)))
-            results[f'{service}_{i}'] = result if result else "Failed to execute"
-    elif service == 'eks':
-        logger.info("Processing EKS service (option 2)")
-        result = execute_resource_lister(generate_commands(service, '2'))
-        results[f'{service}_2'] = result if result else "Failed to execute"
-    elif service == 'emr':
-        logger.info("Processing EMR service (options 1-3)")
-        for i in range(1, 4):
-            logger.info(f"Processing EMR option {i}")
-            result = execute_resource_lister(generate_commands(service, str(i)))
-            results[f'{service}_{i}'] = result if result else "Failed to execute"
-    elif service in ['rds', 'sagemaker']:
-        logger.info(f"Processing {service} service (options 1-5)")
-        for i in range(1, 6):
-            logger.info(f"Processing {service} option {i}")
-            result = execute_resource_lister(generate_commands(service, str(i)))
-            results[f'{service}_{i}'] = result if result else "Failed to execute"
-    elif service == 'CPUUtilization':
-        logger.info("Processing CPUUtilization service (cloudwatch option 3)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '3'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'mem_used_percent':
-        logger.info("Processing mem_used_percent service (cloudwatch option 4)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '4'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'network_in':
-        logger.info("Processing network_in service (cloudwatch option 5)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '5'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'network_out':
-        logger.info("Processing network_out service (cloudwatch option 6)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '6'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'network_packets_in':
-        logger.info("Processing network_packets_in service (cloudwatch option 7)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '7'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'network_packets_out':
-        logger.info("Processing network_packets_out service (cloudwatch option 8)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '8'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'VolumeIOPS':
-        logger.info("Processing VolumeIOPS service (cloudwatch options 9-10)")
-        for i in range(9, 11):
-            logger.info(f"Processing VolumeIOPS option {i}")
-            result = execute_resource_lister(generate_commands('cloudwatch', str(i)))
-            results[f'{service}_{i}'] = result if result else "Failed to execute"
-    elif service == 'VolumeThroughput':
-        logger.info("Processing VolumeThroughput service (cloudwatch options 11-12)")
-        for i in range(11, 13):
-            logger.info(f"Processing VolumeThroughput option {i}")
-            result = execute_resource_lister(generate_commands('cloudwatch', str(i)))
-            results[f'{service}_{i}'] = result if result else "Failed to execute"
-    elif service == 'carbon_footprint':
-        logger.info("Processing carbon_footprint service")
-        result = execute_ccft_access()
-        results[service] = result if result else "Failed to execute"
-    elif service == 'CPUReservation':
-        logger.info("Processing CPUReservation service (cloudwatch option 13)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '13'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'MemoryReservation':
-        logger.info("Processing MemoryReservation service (cloudwatch option 14)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '14'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_read_throughput':
-        logger.info("Processing rds_read_throughput service (cloudwatch option 21)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '21'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_write_throughput':
-        logger.info("Processing rds_write_throughput service (cloudwatch option 22)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '22'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_replica_lag':
-        logger.info("Processing rds_replica_lag service (cloudwatch option 23)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '23'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_aurora_capacity_units':
-        logger.info("Processing rds_aurora_capacity_units service (cloudwatch option 24)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '24'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_cpu_utilization':
-        config = generate_commands('cloudwatch', '15')
-        result = execute_resource_lister(config)
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_freeable_memory':
-        logger.info("Processing rds_freeable_memory service (cloudwatch option 17)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '17'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_database_connections':
-        logger.info("Processing rds_database_connections service (cloudwatch option 16)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '16'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_free_storage_space':
-        logger.info("Processing rds_free_storage_space service (cloudwatch option 18)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '18'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_read_iops':
-        logger.info("Processing rds_read_iops service (cloudwatch option 19)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '19'))
-        results[service] = result if result else "Failed to execute"
-    elif service == 'rds_write_iops':
-        logger.info("Processing rds_write_iops service (cloudwatch option 20)")
-        result = execute_resource_lister(generate_commands('cloudwatch', '20'))
-        results[service] = result if result else "Failed to execute"
-    else:
-        logger.info(f"Processing {service} service with default option 1")
-        result = execute_resource_lister(generate_commands(service))
-        results[service] = result if result else "Failed to execute"
+    jobs = get_option_jobs(service)
+    logger.info(f"Processing {service} : {[result_key for result_key, _, _ in jobs]}")
+    results = run_option_jobs(jobs)
     
     logger.info(f"Final results: {list(results.keys())}")
     logger.info(f"Results summary: {len([r for r in results.values() if r != 'Failed to execute'])} successful, {len([r for r in results.values() if r == 'Failed to execute'])} failed")
@@ -233,9 +192,7 @@ def lambda_handler(event, context):
         if result == "Failed to execute":
             logger.error(f"Service {service_name} failed to execute")
         else:
-            logger.info(f"Service {service_name} completed successfully with output length: {len(result) if result else 0}")
-            if result and len(result) < 3000 and "DISCLAIMER" in result:
-                logger.warning(f"Service {service_name} output appears to be mostly disclaimer text")
+            logger.info(f"Service {service_name} completed successfully")
     
     return {
         "statusCode": 200 if all(results.values()) else 400,
@@ -0,0 +1,6 @@
+def __getattr__(name):
+    # Import API on first use, so importing package doesn't load boto3
+    if name == "run":
+        from .api import run
+        return run
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
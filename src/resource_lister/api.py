@@ -0,0 +1,91 @@
+"""
+Programmatic API to run resource_lister in the calling process
+All options of a call (and of later calls in same process, e.g. warm Lambda container)
+share menu data, sessions, pooled clients and region catalogs, instead of paying
+interpreter start, boto3 import and role assumption for each option.
+
+example :
+    import resource_lister
+    resource_lister.run("ec2", range(1, 16), accounts="ALL", regions="ALL", output="s3")
+"""
+import os
+import logging
+import concurrent.futures
+
+logger = logging.getLogger()
+
+STATUS_SUCCESS = "Success"
+STATUS_FAILED = "Failed"
+DEFAULT_OPTION_CONCURRENCY = 4
+
+
+def get_option_concurrency():
+    """
+    :return: number of options run at same time, RESOURCE_LISTER_OPTION_CONCURRENCY (default 4)
+    """
+    try:
+        return max(1, int(os.getenv("RESOURCE_LISTER_OPTION_CONCURRENCY", DEFAULT_OPTION_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_OPTION_CONCURRENCY
+
+
+def run_option(service, option, accounts="ALL", regions="ALL", output=None):
+    """
+    Run one option of service
+    :return: Success or Failed
+    """
+    import resource_lister.menu.menu_processor as menu_processor
+    import resource_lister.processor.core_processor as core_processor
+    try:
+        process_config = menu_processor.get_process_config(
+            service.lower(), option, accounts, regions, output)
+        core_processor.process(process_config)
+        return STATUS_SUCCESS
+    except Exception as err:
+        logger.error("Failed to execute service {} option {} : {}".format(service, option, err))
+        return STATUS_FAILED
+
+
+def run_services(service_options, accounts="ALL", regions="ALL", output=None):
+    """
+    Run options of several services concurrently in-process
+    At most RESOURCE_LISTER_OPTION_CONCURRENCY options run at same time,
+    failure of one option is logged and doesn't stop other options
+    :param service_options: list of (service, options), options is option or list of options
+    :param accounts: comma seperated account ids or ALL
+    :param regions: comma seperated regions or ALL, used only by regional functions
+    :param output: print, file or s3, default is configured output_to
+    :return: dictionary of service and its dictionary of option and status (Success/Failed)
+    """
+    jobs = []
+    for service, options in service_options:
+        if isinstance(options, (str, int)):
+            options = [options]
+        jobs.extend([(service, str(option)) for option in options])
+    results = dict()
+    for service, option in jobs:
+        results.setdefault(service, dict())
+    # Single option runs inline, caller may already run options concurrently
+    if len(jobs) == 1:
+        service, option = jobs[0]
+        results[service][option] = run_option(service, option, accounts, regions, output)
+        return results
+    with concurrent.futures.ThreadPoolExecutor(max_workers=get_option_concurrency()) as executor:
+        futures = [executor.submit(run_option, service, option, accounts, regions, output)
+                   for service, option in jobs]
+        for (service, option), future in zip(jobs, futures):
+            results[service][option] = future.result()
+    return results
+
+
+def run(service, options, accounts="ALL", regions="ALL", output=None):
+    """
+    Run options of service in-process
+    :param service: service name like ec2, s3
+    :param options: option number, menu_index or list of them
+    :param accounts: comma seperated account ids or ALL
+    :param regions: comma seperated regions or ALL, used only by regional functions
+    :param output: print, file or s3, default is configured output_to
+    :return: dictionary of option and its status (Success/Failed)
+    """
+    return run_services([(service, options)], accounts, regions, output).get(service, dict())
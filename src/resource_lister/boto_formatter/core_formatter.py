@@ -6,7 +6,6 @@ from resource_lister.boto_formatter.service_config_mgr.service_config import Ser
 
 
 # Set up our logger
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
@@ -105,6 +104,10 @@ def __process_service_func_response(function_config, json_config, format_type, r
     result = []
     if "result_keys" in function_config.keys():
         result_keys = function_config["result_keys"]
+    # Parent fields carried into each object of nested result key like Reservations[].Instances[]
+    parent_keys = function_config.get("result_parent_keys")
+    # Compiled once per function by ServiceConfig
+    extraction_plan = function_config.get("extraction_plan")
     # Come columns breaks in csv format so added this condition to exclued these columns
     if required_only is None and format_type is not None:
         if "csv_enforced_required_only" in function_config.keys() and format_type == "csv":
@@ -117,10 +120,10 @@ def __process_service_func_response(function_config, json_config, format_type, r
         if pagination:
             for obj in response:
                 result.extend(json_util.format_json_list(json_config, json_util.format_response_for_result_keys(
-                    obj, result_keys), required_only, prefix_columns))
+                    obj, result_keys, parent_keys), required_only, prefix_columns, extraction_plan))
         else:
             result = json_util.format_json_list(json_config, json_util.format_response_for_result_keys(
-                response, result_keys), required_only, prefix_columns)
+                response, result_keys, parent_keys), required_only, prefix_columns, extraction_plan)
 
     elif response_format == "FORMAT_1":
         result = json_util.format_json_object(json_config, response)
@@ -129,10 +132,10 @@ def __process_service_func_response(function_config, json_config, format_type, r
         if pagination:
             for obj in response:
                 result.extend(json_util.format_str_list(json_config, json_util.format_response_for_result_keys(
-                    obj, result_keys), required_only, prefix_columns))
+                    obj, result_keys, parent_keys), required_only, prefix_columns))
         else:
             result = json_util.format_str_list(json_config, json_util.format_response_for_result_keys(
-                response, result_keys), required_only, prefix_columns)
+                response, result_keys, parent_keys), required_only, prefix_columns)
     return result
 
 
@@ -7,44 +7,236 @@ import os
 import json
 import logging
 logger = logging.getLogger()
-logger.setLevel(logging.ERROR)
 
 
-def flatten_json(y):
+# List item column names, built once instead of str(index) for every item of every object
+_INDEX_NAMES = [str(index) for index in range(1024)]
+# Objects nested deeper than this are walked with an explicit stack instead of recursion
+_RECURSION_DEPTH = 64
+
+
+def _get_children(x, max_list_length):
+    """ Iterator over (key, value) of dict or (index name, item) of list"""
+    if type(x) is dict:
+        return iter(x.items())
+    if max_list_length is not None and len(x) > max_list_length:
+        x = x[:max_list_length]
+    if len(x) <= len(_INDEX_NAMES):
+        return zip(_INDEX_NAMES, x)
+    return zip(map(str, range(len(x))), x)
+
+
+def _flatten_deep(x, prefix, depth, output, prefixes, max_depth, max_list_length):
+    """ Iterative depth first walk for deeply nested objects, same order as recursive walk"""
+    # Stack of (column name prefix, iterator over (key, value), depth)
+    stack = [(prefix, _get_children(x, max_list_length), depth)]
+    while stack:
+        prefix, children, depth = stack[-1]
+        for key, x in children:
+            column_name = prefix + key
+            if prefixes is not None and column_name not in prefixes:
+                continue
+            x_type = type(x)
+            if (x_type is dict or x_type is list) and (max_depth is None or depth < max_depth):
+                stack.append((column_name + "_", _get_children(x, max_list_length), depth + 1))
+                break
+            output[column_name] = x
+        else:
+            stack.pop()
+
+
+def _flatten(y, prefixes=None, max_depth=None, max_list_length=None):
     """
-     Flatten JSON 
-    :param json to be flatten
-    :return: flattend json
+    Depth first flatten, column name prefix is built once per container
+    Objects nested deeper than _RECURSION_DEPTH and bounded walks (max_depth, max_list_length)
+    use iterative walk, so deep responses do not hit recursion limit
+    :param prefixes: if given, only columns in prefixes are visited
     """
     output = {}
+    if type(y) is not dict and type(y) is not list:
+        output[""] = y
+        return output
+    if max_depth is not None or max_list_length is not None:
+        _flatten_deep(y, "", 1, output, prefixes, max_depth, max_list_length)
+        return output
 
-    def flatten(x, name=''):
+    def walk(x, prefix, depth):
         if type(x) is dict:
-            for a in x:
-                flatten(x[a], name + a + '_')
-        elif type(x) is list:
-            i = 0
-            for a in x:
-                flatten(a, name + str(i) + '_')
-                i += 1
+            items = x.items()
+        elif len(x) <= len(_INDEX_NAMES):
+            items = zip(_INDEX_NAMES, x)
         else:
-            output[name[:-1]] = x
-    flatten(y)
+            items = zip(map(str, range(len(x))), x)
+        for key, x in items:
+            column_name = prefix + key
+            if prefixes is not None and column_name not in prefixes:
+                continue
+            x_type = type(x)
+            if x_type is dict or x_type is list:
+                if depth < _RECURSION_DEPTH:
+                    walk(x, column_name + "_", depth + 1)
+                else:
+                    _flatten_deep(x, column_name + "_", depth + 1, output, prefixes, None, None)
+            else:
+                output[column_name] = x
+
+    walk(y, "", 1)
     return output
 
 
-def format_response_for_result_keys(json_object_list, result_keys):
+def flatten_json(y, max_depth=None, max_list_length=None):
+    """
+     Flatten JSON 
+     Column name is path joined with '_', list items are named by index
+    :param json to be flatten
+    :param max_depth optional, objects deeper than max_depth are kept as value of their column
+    :param max_list_length optional, only first max_list_length items of each list are flattened
+    :return: flattend json
+    """
+    return _flatten(y, max_depth=max_depth, max_list_length=max_list_length)
+
+
+class ExtractionPlan():
+    """
+    Extraction plan compiled once from reference json (json_response)
+    Flattened key is path joined with '_', so plan keeps every '_' seperated prefix of
+    reference keys and walks only branches that can reach a reference key.
+    """
+
+    def __init__(self, json_config):
+        self.keys = list(json_config.keys())
+        self.key_set = set(self.keys)
+        prefixes = set(self.keys)
+        for key in self.keys:
+            index = key.find("_")
+            while index != -1:
+                prefixes.add(key[:index])
+                index = key.find("_", index + 1)
+        self.prefixes = prefixes
+
+    def extract(self, y):
+        """
+        Same as flatten_json but only for branches leading to reference keys
+        Values are visited in same order, so repeated flattened keys resolve same way
+        :param json to be extracted
+        :return: flattend json containing reference keys found
+        """
+        return _flatten(y, self.prefixes)
+
+
+class ChildTablePlan():
+    """
+    Child tables compiled once from reference json (json_response)
+    List attributes like Tags are written as seperate narrow tables, one row per list item
+    keyed by parent id column, instead of widened into parent row as Tags_0_Key, Tags_1_Key...
+    Reference key Tags_0_Key becomes column Key of child table Tags, Tags_0 (list of strings) becomes Tags.
+    """
+
+    def __init__(self, json_config, child_tables, parent_key):
+        self.parent_key = parent_key
+        self.names = list(child_tables)
+        child_configs = {name: {parent_key: "string"} for name in self.names}
+        parent_config = {}
+        for key, value in json_config.items():
+            name = key.split("_", 1)[0]
+            if name in child_configs and (key == name + "_0" or key.startswith(name + "_0_")):
+                child_configs[name][key[len(name) + 3:] or name] = value
+            else:
+                parent_config[key] = value
+        self.json_config = parent_config
+        self.extraction_plan = ExtractionPlan(parent_config)
+        self.child_configs = child_configs
+        self.child_plans = {name: ExtractionPlan(child_config) for name, child_config in child_configs.items()}
+
+    def split(self, json_object_list, child_objects):
+        """
+        Move child list attributes out of objects, objects are not modified
+        :param json_object_list - JSON objects like instances
+        :param child_objects - dictionary of child table name and list, child rows are appended
+        :return: JSON objects without child list attributes
+        """
+        parent_key = self.parent_key
+        parent_list = []
+        for json_object in json_object_list:
+            parent = json_object
+            parent_id = json_object.get(parent_key, "")
+            for name in self.names:
+                items = json_object.get(name)
+                if type(items) is not list:
+                    continue
+                if parent is json_object:
+                    parent = dict(json_object)
+                del parent[name]
+                rows = child_objects.setdefault(name, [])
+                for item in items:
+                    row = {parent_key: parent_id}
+                    if type(item) is dict:
+                        row.update(item)
+                        row[parent_key] = parent_id
+                    else:
+                        row[name] = item
+                    rows.append(row)
+            parent_list.append(parent)
+        return parent_list
+
+
+def _explode_result_key(json_object, result_key, parent_keys=None):
+    """
+    Follow result key path like Reservations[].Instances[]
+    Each segment ending with [] (and last segment) is a list whose items are walked one by one,
+    so result is one object per item of last list.
+    :param parent_keys - keys of exploded parent objects copied into each child object,
+                         child keeps its own value if it has same key
+    :return: List of JSON objects
+    """
+    segments = result_key.split(".")
+    json_object_list = [json_object]
+    for segment_index, segment in enumerate(segments):
+        explode = segment.endswith("[]") or segment_index == len(segments) - 1
+        key = segment[:-2] if segment.endswith("[]") else segment
+        next_list = []
+        for parent in json_object_list:
+            if key not in parent:
+                continue
+            value = parent[key]
+            if not explode:
+                next_list.append(value)
+                continue
+            if type(value) is not list:
+                raise TypeError("{} is not a list".format(key))
+            carried = None
+            # Response itself is not a parent resource
+            if parent_keys and segment_index > 0:
+                carried = {parent_key: parent[parent_key]
+                           for parent_key in parent_keys if parent_key in parent}
+            if not carried:
+                next_list.extend(value)
+                continue
+            for child in value:
+                child_object = dict(carried)
+                child_object.update(child)
+                next_list.append(child_object)
+        json_object_list = next_list
+    return json_object_list
+
+
+def format_response_for_result_keys(json_object_list, result_keys, parent_keys=None):
     """
     Iterate over result keys in JSON to get appropriate List
+    Result key can be nested explode path like Reservations[].Instances[] to get one object per Instance
     :param json_object_list -JSON object which contains result_key(or Keys)
     :param result_keys  - List of Keys to be search in JSON
+    :param parent_keys  - optional, keys of exploded parents like OwnerId carried into each object
     :return: List of JSON objects
     """
     """"""
     try:
         for result_key in result_keys:
             if len(json_object_list) > 0:
-                json_object_list = json_object_list[result_key]
+                if "[]" in result_key:
+                    json_object_list = _explode_result_key(json_object_list, result_key, parent_keys)
+                else:
+                    json_object_list = json_object_list[result_key]
     except KeyError as err:
         # This is to handle when pagination iterate even though there is no record
         json_object_list = []
@@ -59,14 +251,15 @@ def format_response_for_result_keys(json_object_list, result_keys):
     return json_object_list
 
 
-def format_json_list(json_config, json_object_list, required_only, prefix_columns=None):
+def format_json_list(json_config, json_object_list, required_only, prefix_columns=None, extraction_plan=None,
+                     list_extras=True):
     """
     Prior : 
     Filter Result Keys
     Append addtional columns
     Compare all objects in JSON List with reference json(json_config) and generate list
     1. Iterate each object in List
-    2. Flatten the object
+    2. Flatten the object (only reference keys if required_only)
     3. Get Keys of reference JSON
     4. Iterate over reference JSON keys and generate result row
     5. Update result rows with not found keys (Extra Columns)
@@ -74,43 +267,52 @@ def format_json_list(json_config, json_object_list, required_only, prefix_column
     :param json_object_list  - json list that need to be formatted
     :param required_only  - if interest is only in required only attributes
     :param prefix_columns  -if addtional prefix columns you want to add in response
+    :param extraction_plan  -ExtractionPlan of json_config, compiled here if not provided
+    :param list_extras  -if False, attributes inside lists are not added as extra columns
     :return: return json object list formatted in line with json_config
     """
     result_json_list = []
-    json_config_keys = json_config.keys()
+    if extraction_plan is None:
+        extraction_plan = ExtractionPlan(json_config)
+    json_config_keys = extraction_plan.keys
+    json_config_key_set = extraction_plan.key_set
     First_record = True
     # 1 Take each object in list
     # 1 Outer Loop
     # if json_object_list is zero size loop will not execute
     for json_object_raw in json_object_list:
-        # 2 Flatten the object
-        json_object = flatten_json(json_object_raw)
+        # 2 Flatten the object, extra columns are not needed for required_only
+        if required_only:
+            json_object = extraction_plan.extract(json_object_raw)
+        elif list_extras:
+            json_object = flatten_json(json_object_raw)
+        else:
+            # Reference keys inside lists are kept, other list items are not widened into columns
+            json_object = flatten_json(json_object_raw, max_list_length=0)
+            json_object.update(extraction_plan.extract(json_object_raw))
         result_row = {}
-        keys_present_list = []
+        keys_present_count = 0
         # 3 Append Prefix columns values like Account, Region
         if prefix_columns:
             for prefix_column_header in prefix_columns.keys():
                 result_row[prefix_column_header] = prefix_columns[prefix_column_header]
-        # 4. Get keys of reference JSON
-        json_object_keys = json_object.keys()
         # 5 Go Through All the keys of reference JSON
         for json_config_key in json_config_keys:
-            if json_config_key in json_object_keys:
+            if json_config_key in json_object:
                 result_row[json_config_key] = str(json_object[json_config_key])
-                keys_present_list.append(json_config_key)
+                keys_present_count += 1
             else:
                 result_row[json_config_key] = ""
         # 6. Append Extra Cloumns as pipe seprated Key/Value
         # If required_only is selected don't need extra columns
         if not required_only:
-            extra_rows = [
-                i for i in json_object_keys if i not in keys_present_list]
-            for extra_row_key in extra_rows:
-                result_row[extra_row_key] = "{}|{}".format(
-                    extra_row_key, json_object[extra_row_key])
+            for extra_row_key in json_object:
+                if extra_row_key not in json_config_key_set:
+                    result_row[extra_row_key] = "{}|{}".format(
+                        extra_row_key, json_object[extra_row_key])
         # 7 None of key matches for first row raise and exception as it's not valid JSON
         if First_record:
-            if len(keys_present_list) == 0:
+            if keys_present_count == 0:
                 raise ValueError(
                     "Zero record keys are matching. Check the JSON result is appropriate format")
         First_record = False
@@ -154,9 +356,8 @@ def format_json_object(json_config, json_object_raw):
     """
     Compare Json_object with reference json(json_config) and generate JSON Object
     1. Flatten the object
-    2. Get Keys of reference JSON
-    3. Iterate over reference JSON keys and generate result row
-    4. Update result rows with not found keys (Extra Columns)
+    2. Iterate over reference JSON keys and generate result row
+    3. Update result rows with not found keys (Extra Columns)
     :param json_config -reference json
     :param json_object_raw  - json object to be formatted
     :return: return json object formated in line with json_config
@@ -165,21 +366,17 @@ def format_json_object(json_config, json_object_raw):
     # 2 Flatten the object
     json_object = flatten_json(json_object_raw)
     result_row = {}
-    keys_present_list = []
-    # 3. Get keys of reference JSON
-    json_object_keys = json_object.keys()
-    # 4 Go Through All the keys of reference JSON
+    # 3 Go Through All the keys of reference JSON
     for json_config_key in json_config_keys:
-        if json_config_key in json_object_keys:
+        if json_config_key in json_object:
             result_row[json_config_key] = str(json_object[json_config_key])
-            keys_present_list.append(json_config_key)
         else:
             result_row[json_config_key] = ""
-    # 5. Append Extra Cloumns as pipe seprated Key/Value
-    extra_rows = [i for i in json_object_keys if i not in keys_present_list]
-    for extra_row_key in extra_rows:
-        result_row[extra_row_key] = "{}|{}".format(
-            extra_row_key, json_object[extra_row_key])
+    # 4. Append Extra Cloumns as pipe seprated Key/Value
+    for extra_row_key in json_object:
+        if extra_row_key not in json_config:
+            result_row[extra_row_key] = "{}|{}".format(
+                extra_row_key, json_object[extra_row_key])
 
     return result_row
 
@@ -192,9 +389,19 @@ def get_csv_data(result_json_list):
     csv_data = []
     if len(result_json_list) > 0:
         logger.debug(result_json_list)
-        csv_data.append(",".join(result_json_list[0].keys()))
+        # Rows may have different extra columns, header is union of columns of all rows
+        header = dict()
         for json_obj in result_json_list:
-            csv_data.append(",".join(json_obj.values()))
+            for key in json_obj:
+                if key not in header:
+                    header[key] = None
+        header_keys = list(header)
+        csv_data.append(",".join(header_keys))
+        for json_obj in result_json_list:
+            if list(json_obj) == header_keys:
+                csv_data.append(",".join(json_obj.values()))
+            else:
+                csv_data.append(",".join(json_obj.get(key, "") for key in header_keys))
     return csv_data
 
 
@@ -222,11 +429,12 @@ def get_output_path():
     dir_path = os.getenv("OUTPUT_PATH")
     return dir_path
 
-def get_file_path(service_name, function_name, dir_path, file_type):
+def get_file_path(service_name, function_name, dir_path, file_type, file_prefix=None):
     """
      Generate file path based on service_name and function_name
     :param service_name like s3, lambda
     :param function_name like list_buckets
+    :param file_prefix optional prefix like account id, keeps concurrent outputs apart
     :return: None
     """
     # if not os.path.exists(dir_path):
@@ -235,27 +443,30 @@ def get_file_path(service_name, function_name, dir_path, file_type):
     current_date = datetime.datetime.now().strftime("%d_%m_%Y_%H_%M_%S")
     file_name = "{}_{}_{}.{}".format(
         service_name, function_name, current_date, file_type)
+    if file_prefix:
+        file_name = "{}_{}".format(file_prefix, file_name)
     output_path = os.path.join(dir_path, "output")
     logger.info("Output directory path {} ".format(output_path))
-    if not os.path.exists(output_path):
-        os.mkdir(output_path)
+    # Concurrent batch functions may create directory at same time
+    os.makedirs(output_path, exist_ok=True)
     file_path = os.path.join(output_path, file_name)
     logger.info("File Path {}".format(file_path))
     return file_path
 
 
-def save_csv(csv_data, service_name, function_name, dir_path):
+def save_csv(csv_data, service_name, function_name, dir_path, file_prefix=None):
     """
      save file as .csv
     :param csv_data data in list of comma seperated strings
     :param service_name like s3, lambda
     :param function_name like list_buckets
+    :param file_prefix optional file name prefix
     :return: None
     """
     file_full_path = None
     if len(csv_data) > 0:
         file_full_path = get_file_path(
-            service_name, function_name, dir_path, "csv")
+            service_name, function_name, dir_path, "csv", file_prefix)
         f = open(file_full_path, "w")
         for row in csv_data:
             f.write(row + "\n")
@@ -265,12 +476,13 @@ def save_csv(csv_data, service_name, function_name, dir_path):
     return file_full_path
 
 
-def save_json(json_data, service_name, function_name, dir_path=None):
+def save_json(json_data, service_name, function_name, dir_path=None, file_prefix=None):
     """
      save file as .json
     :param json_data json formatted data
     :param service_name like s3, lambda
     :param function_name like list_buckets
+    :param file_prefix optional file name prefix
     :return: None
     """
     file_full_path = None
@@ -278,7 +490,7 @@ def save_json(json_data, service_name, function_name, dir_path=None):
         json_data_list = dict()
         json_data_list["result"] = json_data
         file_full_path = get_file_path(
-            service_name, function_name, dir_path, "json")
+            service_name, function_name, dir_path, "json", file_prefix)
         json_data_list = json.dumps(json_data_list, indent=4, default=str)
         # Writing to sample.json
         with open(file_full_path, "w") as outfile:
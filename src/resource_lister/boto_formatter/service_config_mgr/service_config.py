@@ -1,104 +1,53 @@
 """
 Read all the service definations from service_configs and store the values
 in dictionary.
+Service definations are served from compiled config registry (util/config_registry.py)
 
 """
 import logging
-import os
-import json
+import threading
+from resource_lister.util.config_registry import ConfigRegistry
+from resource_lister.boto_formatter.json_util.json_util import ExtractionPlan, ChildTablePlan
 
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
-def get_service_name(file_name):
-    """
-    File should be in .json format
-    This function strip last four character .json and return value
-    :param file_name
-    :return: service_name
-    """
-    json_file_name = None
-    try:
-        json_file_name = file_name[0:len(file_name)-5]
-    except Exception as err:
-        logger.error(err)
-        ERROR_MESSAGE = " Invalid file {} found in service_config directory. service_config shoudl contain only .json files".format(
-            file_name)
-        raise ValueError(ERROR_MESSAGE)
-
-    return json_file_name
-
-
 class ServiceConfig():
     """ This class hold the  values from service_configs"""
     __data = {}
+    __lock = threading.Lock()
 
     @classmethod
     def load_all_service_data(cls):
         """ Load config values for all services"""
-        try:
-            dir_path = os.path.dirname(os.path.abspath(__file__))
-            dir_path_service = os.path.join(dir_path, "service_configs")
-            for service_file in os.listdir(dir_path_service):
-                service_name = get_service_name(service_file)
-                logger.info("{}.json found ".format(service_name))
-                file_path = os.path.join(dir_path_service, service_file)
-                f = open(file_path)
-                temp_data = json.load(f)
-                service_name = temp_data["service_name"]
-                ServiceConfig.__data[service_name] = {}
-                ServiceConfig.__data[service_name]["service_name"] = service_name
-                for function_details in temp_data["functions"]:
-                    function_name = function_details["function_name"]
-                    ServiceConfig.__data[service_name][function_name] = ServiceConfig.__process_function_details(
-                        function_details)
-                f.close()
-        except KeyError as err:
-            logger.error(
-                "Please check service_config.json file . File syntax is not correct.")
-            raise err
-        except FileNotFoundError as err:
-            logger.error(
-                "File service_config.json file is not Found. Please check aws_account_config.json file exists")
-            raise err
-        except IOError as err:
-            logger.error(
-                " IO error while loading the file aws_account_config.json {}. ".format(err))
-            raise err
+        for service_name in ConfigRegistry.get_registry()["services"]:
+            ServiceConfig.load_service_data(service_name)
 
     @classmethod
     def load_service_data(cls, service_name):
         """ Load config values for perticular service from <service_name>.json file in service_configs folder"""
         logger.info("loading Data for service_name {}...".format(service_name))
         try:
-            dir_path = os.path.dirname(os.path.abspath(__file__))
-            dir_path_service = os.path.join(dir_path, "service_configs")
-            for service_file in os.listdir(dir_path_service):
-                if service_name == get_service_name(service_file):
-                    file_path = os.path.join(dir_path_service, service_file)
-                    f = open(file_path)
-                    temp_data = json.load(f)
-                    service_name = temp_data["service_name"]
-                    ServiceConfig.__data[service_name] = {}
-                    ServiceConfig.__data[service_name]["service_name"] = service_name
-                    for function_details in temp_data["functions"]:
-                        function_name = function_details["function_name"]
-                        ServiceConfig.__data[service_name][function_name] = ServiceConfig.__process_function_details(
-                            function_details)
-                    f.close()
+            # Registry publishes fully processed services, json_response_required is precomputed
+            service_data = ConfigRegistry.get_service_config(service_name)
         except KeyError as err:
             logger.error(
                 "Please check service_config.json file . File syntax is not correct.")
             raise err
-        except FileNotFoundError as err:
-            logger.error(
-                "File service_config.json file is not Found. Please check aws_account_config.json file exists")
-            raise err
         except IOError as err:
             logger.error(
-                " IO error while loading the file aws_account_config.json {}. ".format(err))
+                " IO error while loading service configs {}. ".format(err))
             raise err
+        if service_data is not None:
+            # Publish service only when all functions are processed
+            service_config = {}
+            for function_name, function_details in service_data.items():
+                if function_name == "service_name":
+                    service_config[function_name] = function_details
+                else:
+                    service_config[function_name] = ServiceConfig.__process_function_details(
+                        function_details)
+            ServiceConfig.__data[service_name] = service_config
 
     @ classmethod
     def get_service_function_details(cls, service_name, function_name):
@@ -108,7 +57,9 @@ class ServiceConfig():
                 if function_name in ServiceConfig.__data[service_name]:
                     function_config = ServiceConfig.__data[service_name][function_name]
             else:
-                ServiceConfig.load_service_data(service_name)
+                with ServiceConfig.__lock:
+                    if service_name not in ServiceConfig.__data.keys():
+                        ServiceConfig.load_service_data(service_name)
                 # Second Iteration don't catch the exception
                 function_config = ServiceConfig.__data[service_name][function_name]
         except KeyError as err:
@@ -120,11 +71,10 @@ class ServiceConfig():
 
     @ classmethod
     def __process_function_details(cls, function_details):
-        """ Add required only json_response """
-        json_response_required = dict()
-        json_response = function_details["json_response"]
-        for key in json_response.keys():
-            if json_response[key] == "required":
-                json_response_required[key] = json_response[key]
-        function_details["json_response_required"] = json_response_required
+        """ Add extraction and child table plans compiled from json_response, registry entry is not modified"""
+        function_details = dict(function_details)
+        function_details["extraction_plan"] = ExtractionPlan(function_details["json_response"])
+        if "child_tables" in function_details:
+            function_details["child_table_plan"] = ChildTablePlan(
+                function_details["json_response"], function_details["child_tables"], function_details["child_table_key"])
         return function_details
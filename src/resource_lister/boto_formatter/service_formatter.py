@@ -8,7 +8,6 @@ import time
 
 
 # Set up our logger
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
@@ -18,14 +17,16 @@ def service_response_formatter(service_name, function_name, response, attributes
     :param service_name: example lambda, s3
     :param function_name: example list_functions
     :param response: list of json objects
-    :param attributes: format_type,output_to,output_path,pagination,required_only
-    :return: formatted response
+    :param attributes: format_type,output_to,output_path,pagination,required_only,child_tables
+    :return: formatted response, list of file paths if child tables are written to file/s3
     """
     format_type = None  # Options are json or csv. Default is json
     output_to = None  # Options are print or file. Default is print
     output_path = None  # Default is none, user can provide custom path
     pagination = False
     required_only = None  # Default is none if required only fields
+    file_prefix = None  # Default is none, batch uses account id
+    child_tables = False  # Default is no, list attributes are widened into parent row
     # default type is json. Supported types are json,csv
     if attributes is not None:
         if "format_type" in attributes:
@@ -41,6 +42,10 @@ def service_response_formatter(service_name, function_name, response, attributes
                 pagination = True
         if "required_only" in attributes:
             required_only = True
+        if "file_prefix" in attributes:
+            file_prefix = attributes["file_prefix"]
+        if "child_tables" in attributes:
+            child_tables = str(attributes["child_tables"]).lower() == "yes"
     if output_path is None:
         output_path = os.getcwd()
     json_config = None
@@ -51,9 +56,16 @@ def service_response_formatter(service_name, function_name, response, attributes
     response_format = function_config["response_format"]
     # Some columns breaks as comma so for csv format put required only condition
 
+    # Child tables are configured per function with child_tables and child_table_key
+    child_table_plan = None
+    if child_tables:
+        child_table_plan = function_config.get("child_table_plan")
+    child_results = dict()
+
     start_time = time.time()
     result = __process_response(
-        function_config, json_config, format_type, required_only, response, pagination)
+        function_config, json_config, format_type, required_only, response, pagination,
+        child_table_plan, child_results)
     logger.debug("Flattening JSON took--- %s seconds ---" %
                  (time.time() - start_time))
     if format_type:
@@ -61,17 +73,65 @@ def service_response_formatter(service_name, function_name, response, attributes
     if output_to:
         result = __ouput_to(service_name, function_name,
                             result, output_to, format_type,
-                            output_path, response_format)
+                            output_path, response_format, file_prefix)
+        if child_table_plan:
+            child_file_paths = __ouput_child_tables(service_name, function_name, child_table_plan, child_results,
+                                                    output_to, format_type, output_path, response_format, file_prefix)
+            if child_file_paths:
+                result = [file_path for file_path in [result] + child_file_paths if file_path]
     return result
 
 
-def __process_response(function_config, json_config, format_type, required_only, response, pagination):
+def __ouput_child_tables(service_name, function_name, child_table_plan, child_results, output_to, format_type, output_path, response_format, file_prefix=None):
+    """
+    Output each child table like a function named <function_name>_<child table>
+    :param child_results: dictionary of child table name and its formatted rows
+    :return: list of generated file paths
+    """
+    file_paths = []
+    for name in child_table_plan.names:
+        if name not in child_results:
+            continue
+        child_result = child_results[name]
+        if format_type:
+            child_result = __format_ouput(child_result, format_type)
+        if output_to == "print":
+            print("RESULT : Child table {} keyed by {}".format(name, child_table_plan.parent_key))
+        file_path = __ouput_to(service_name, "{}_{}".format(function_name, name),
+                               child_result, output_to, format_type,
+                               output_path, response_format, file_prefix)
+        if output_to == "file" or output_to == "s3":
+            file_paths.append(file_path)
+    return file_paths
+
+
+def __format_json_list(json_config, json_object_list, required_only, prefix_columns, extraction_plan, child_table_plan=None, child_results=None):
+    """
+    format_json_list, if child_table_plan is given child list attributes are formatted into child_results
+    and other lists are not widened into extra columns, so parent and child tables stay narrow
+    :param child_results: dictionary of child table name and its formatted rows
+    :return: formatted list of flattend JSON objects
+    """
+    if child_table_plan is None:
+        return json_util.format_json_list(json_config, json_object_list, required_only, prefix_columns, extraction_plan)
+    child_objects = dict()
+    json_object_list = child_table_plan.split(json_object_list, child_objects)
+    for name, child_object_list in child_objects.items():
+        child_results.setdefault(name, []).extend(json_util.format_json_list(
+            child_table_plan.child_configs[name], child_object_list, required_only, prefix_columns,
+            child_table_plan.child_plans[name], list_extras=False))
+    return json_util.format_json_list(child_table_plan.json_config, json_object_list, required_only, prefix_columns,
+                                      child_table_plan.extraction_plan, list_extras=False)
+
+
+def __process_response(function_config, json_config, format_type, required_only, response, pagination, child_table_plan=None, child_results=None):
     """
     :param function_config : function defined in service_config.json
     :param json_config: reference response
     :param required_only: if present filter the result for required onlydata
     :param response : List of Json object
     :pagination :if present json list is part of pagination
+    :param child_table_plan: optional, FORMAT_2 list attributes are formatted as child tables into child_results
     :return: formatted list of flattend JSON objects
     """
     response_format = function_config["response_format"]
@@ -79,6 +139,10 @@ def __process_response(function_config, json_config, format_type, required_only,
     final_result = []
     if "result_keys" in function_config.keys():
         result_keys = function_config["result_keys"]
+    # Parent fields carried into each object of nested result key like Reservations[].Instances[]
+    parent_keys = function_config.get("result_parent_keys")
+    # Compiled once per function by ServiceConfig
+    extraction_plan = function_config.get("extraction_plan")
     if required_only is None and format_type is not None:
         if "csv_enforced_required_only" in function_config.keys() and format_type == "csv":
             required_only = "Yes"
@@ -95,16 +159,18 @@ def __process_response(function_config, json_config, format_type, required_only,
                 if "prefix_columns" in item.keys():
                     prefix_columns = item["prefix_columns"]
                 for obj in result:
-                    final_result.extend(json_util.format_json_list(json_config, json_util.format_response_for_result_keys(
-                        obj, result_keys), required_only, prefix_columns))
+                    final_result.extend(__format_json_list(json_config, json_util.format_response_for_result_keys(
+                        obj, result_keys, parent_keys), required_only, prefix_columns, extraction_plan,
+                        child_table_plan, child_results))
         else:
             for item in response:
                 result = item["result"]
                 prefix_columns = None
                 if "prefix_columns" in item.keys():
                     prefix_columns = item["prefix_columns"]
-                final_result.extend(json_util.format_json_list(json_config, json_util.format_response_for_result_keys(
-                    result, result_keys), required_only, prefix_columns))
+                final_result.extend(__format_json_list(json_config, json_util.format_response_for_result_keys(
+                    result, result_keys, parent_keys), required_only, prefix_columns, extraction_plan,
+                    child_table_plan, child_results))
     elif response_format == "FORMAT_1":
         final_result = json_util.format_json_object(json_config, response)
 
@@ -119,7 +185,7 @@ def __process_response(function_config, json_config, format_type, required_only,
                     prefix_columns = item["prefix_columns"]
                 for obj in result:
                     final_result.extend(json_util.format_str_list(json_config, json_util.format_response_for_result_keys(
-                        obj, result_keys), required_only, prefix_columns))
+                        obj, result_keys, parent_keys), required_only, prefix_columns))
         else:
             for item in response:
                 result = item["result"]
@@ -127,7 +193,7 @@ def __process_response(function_config, json_config, format_type, required_only,
                 if "prefix_columns" in item.keys():
                     prefix_columns = item["prefix_columns"]
                 final_result.extend(json_util.format_str_list(json_config, json_util.format_response_for_result_keys(
-                    result, result_keys), required_only, prefix_columns))
+                    result, result_keys, parent_keys), required_only, prefix_columns))
 
     return final_result
 
@@ -144,7 +210,7 @@ def __format_ouput(result, format_type):
         return result
 
 
-def __ouput_to(service_name, function_name, result, output_to, format_type, output_path, response_format):
+def __ouput_to(service_name, function_name, result, output_to, format_type, output_path, response_format, file_prefix=None):
     """
     :param service_name :service_name like s3, lambda
     :param function_name: function name like list_buckets
@@ -152,6 +218,7 @@ def __ouput_to(service_name, function_name, result, output_to, format_type, outp
     :param format_type: csv or json
     :param output_path: user provided output_path to save file
     :response_format:FORMAT_1,FORMAT_2,FORMAT_3
+    :param file_prefix: optional prefix of generated file name
     :return: formatted list of comma seperated string
     """
     if output_to == "print":
@@ -161,10 +228,10 @@ def __ouput_to(service_name, function_name, result, output_to, format_type, outp
             file_path = None
             if format_type == "csv":
                 file_path = json_util.save_csv(
-                    result, service_name, function_name, output_path)
+                    result, service_name, function_name, output_path, file_prefix)
             else:
                 file_path = json_util.save_json(
-                    result, service_name, function_name, output_path)
+                    result, service_name, function_name, output_path, file_prefix)
         return file_path
     else:
         return result
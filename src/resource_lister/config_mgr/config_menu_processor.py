@@ -5,7 +5,6 @@ import logging
 import resource_lister.config_mgr.config_util as config_util
 import resource_lister.util.menu_configs as config_menu_configs
 import resource_lister.util.menu_util as menu_util
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
@@ -14,8 +13,9 @@ def print_configure_utility():
     : Print the utility configuraiton to console
     """
     attributes = dict(config_util.ConfigAttributes.get_config_attributes())
-    CONFIGURATION = "CURRENT CONFIGURATIONS :\n 1. Format Type (csv/json) : {} \n 2. Output To (print/file/s3) :{}\n 3. Generate only required Columns (yes/no): {}\n 4. Generate seperate file for each AWS Account (yes/no) : {}\n 5. S3 Bucket : {}\n".format(
-        attributes["format_type"], attributes["output_to"], attributes["required"], attributes["account_split"], attributes["s3_bucket"])
+    CONFIGURATION = "CURRENT CONFIGURATIONS :\n 1. Format Type (csv/json) : {} \n 2. Output To (print/file/s3) :{}\n 3. Generate only required Columns (yes/no): {}\n 4. Generate seperate file for each AWS Account (yes/no) : {}\n 5. S3 Bucket : {}\n 6. Generate child tables for list attributes (yes/no) : {}\n".format(
+        attributes["format_type"], attributes["output_to"], attributes["required"], attributes["account_split"], attributes["s3_bucket"],
+        attributes.get("child_tables", "no"))
     print(CONFIGURATION)
 
 
@@ -103,3 +103,20 @@ def modify_s3_bucket():
     # Print statement to print output to command prompt
     print(" Generate seperate file for each AWS Account updated  to {}.".format(s3_bucket))
     print_configure_utility()
+
+
+def modify_child_tables():
+    """
+    : modify child_tables option in config.json
+    """
+    input_json = dict()
+    input_json_value = menu_util.process_inputs(
+        config_menu_configs.child_tables_config, input_json)
+    child_tables = input_json_value["child_tables"]
+    config_attributes = dict(
+        config_util.ConfigAttributes.get_config_attributes())
+    config_attributes["child_tables"] = child_tables
+    config_util.ConfigAttributes.update_config_attributes(config_attributes)
+    # Print statement to print output to command prompt
+    print("Generate child tables for list attributes updated  to {}.".format(child_tables))
+    print_configure_utility()
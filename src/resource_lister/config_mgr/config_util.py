@@ -5,7 +5,6 @@ import json
 import os
 import logging
 from ..util.load_config import load_config_attributes_json
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
@@ -77,6 +76,7 @@ if __name__ == "__main__":
         "output_to": "file",
         "required": "no",
         "account_split": "no",
+        "child_tables": "no",
         "s3_bucket": "bbc"
 
     }
@@ -1,14 +1,13 @@
-from .menu import menu_processor
-import json
 import logging
 
-# Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
 
 def main():
+    # Logging is configured once here, library modules only get loggers
+    logging.basicConfig(level=logging.ERROR)
+    # Imported on run so --help and argument errors don't load menus or boto3
+    from .menu import menu_processor
     args = menu_processor.setup_args()
     menu_processor.process(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,82 +1,210 @@
 """
 This is supporting functions to for batch processing option
 """
+import os
 import logging
+import itertools
+import collections
+import concurrent.futures
 import resource_lister.menu.menu_util as menu_util
 import resource_lister.processor.core_processor as core_processor
 import time
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
+DEFAULT_BATCH_CONCURRENCY = 8
+DEFAULT_BATCH_ACCOUNT_CONCURRENCY = 4
+DEFAULT_BATCH_SERVICE_CONCURRENCY = 2
+
 
 def process_batch():
     # Get list of configured accounts
     account_list = menu_util.MenuData.get_account_list()
-    account_selected = None
-    is_account_validated = False
-    no_process_break = True
-    while not is_account_validated:
-        account_selected_input = input("Please enter account id  HERE--> ").strip()
+    accounts_selected = None
+    while accounts_selected is None:
+        accounts_input = input(
+            "Please enter comma seperated account id(s) or ALL  HERE--> ").strip()
         # When user selects -1 break the loop
-        if account_selected == "-1":
-            no_process_break = False
+        if accounts_input == "-1":
             break
-        else:
-            # if account is valid
-            if account_selected_input in account_list:
-                account_selected = account_selected_input
-                is_account_validated = True
-            else:
-                print("Please enter valid accounts : Valid accounts are .. ")
-                menu_util.print_accounts()
-    if no_process_break:
-        if account_selected:
-            process(account_selected)
-
-
-def process(account_selected):
+        accounts_selected = get_batch_accounts(accounts_input, account_list)
+        if accounts_selected is None:
+            print("Please enter valid accounts : Valid accounts are .. ")
+            menu_util.print_accounts()
+    if accounts_selected:
+        process(accounts_selected)
+
+
+def get_batch_accounts(accounts_input, account_list):
+    """
+    :param accounts_input: ALL, single account id or comma seperated account ids
+    :param account_list: configured accounts
+    :return: list of selected configured accounts, None if none is valid
+    """
+    if accounts_input.strip().upper() == "ALL":
+        return list(account_list)
+    accounts_selected = []
+    for account in accounts_input.split(","):
+        account = account.strip()
+        if account in account_list and account not in accounts_selected:
+            accounts_selected.append(account)
+    if len(accounts_selected) == 0:
+        return None
+    return accounts_selected
+
+
+def get_env_limit(env_name, default_value):
+    try:
+        return max(1, int(os.getenv(env_name, default_value)))
+    except ValueError:
+        return default_value
+
+
+def get_batch_jobs(accounts_selected):
     """
     1. Get configuration information for each menu (menu_config.json)
     2. Process only those services who are qualifed for multi account support
-    3. Process only those services who doesn't require any user input 
+    3. Process only those services who doesn't require any user input
+    Each job covers one account, so S3 key stays data/batch/{account}/date=...
+    :param accounts_selected: list of account ids
+    :return: list of process_config for each account and function
     """
-
-    count = 1
     region_list = menu_util.MenuData.get_region_list()
-    account_list = []
-    account_list.append(account_selected)
-    begin_time = time.time()
-    pagination_attribute_flag = True
     attributes = menu_util.MenuData.get_attributes()
-    attributes["is_batch"] = "True"
-    for service in menu_util.MenuData.get_service_list():
-        menu_list = menu_util.MenuData().search_menu_data(service)
-        for process_config in menu_list:
-            process_config_obj = dict(process_config)
-            pagination_attribute_flag = True
-            if process_config_obj["is_multi_account_support"] == "yes":
-                start_time = time.time()
-                process_config_obj["accounts"] = account_list
-                if process_config_obj["is_regional"] == "yes":
-                    process_config_obj["regions"] = region_list
-                if "pagination_attributes" in process_config_obj.keys():
-                    refined_pagination_attributes = {}
-                    for pagination_attribute in process_config_obj["pagination_attributes"]:
-                        if pagination_attribute["is_visible"].upper() == "YES":
-                            pagination_attribute_flag = False
-                        else:
-                            refined_pagination_attributes[pagination_attribute["attribute_name"]
-                                                          ] = pagination_attribute["attribute_value"]
-                            process_config_obj["pagination_attributes"] = refined_pagination_attributes
-                process_config_obj["attributes"] = dict(attributes)
-                if pagination_attribute_flag:
-                    print("Start Processing for service : {} function :{}".format(process_config_obj["service_name"],process_config_obj["function_name"]))
-                    # core processor process the service
-                    core_processor.process(process_config_obj)
-                    print("Report generated for service {} function {} :TIME Taken -->{}".format(
-                        process_config_obj["service_name"], process_config_obj["function_name"], (time.time() - start_time)))
+    batch_jobs = []
+    for account_selected in accounts_selected:
+        account_list = []
+        account_list.append(account_selected)
+        for service in menu_util.MenuData.get_service_list():
+            menu_list = menu_util.MenuData().search_menu_data(service)
+            for process_config in menu_list:
+                process_config_obj = dict(process_config)
+                pagination_attribute_flag = True
+                if process_config_obj["is_multi_account_support"] == "yes":
+                    process_config_obj["accounts"] = account_list
+                    if process_config_obj["is_regional"] == "yes":
+                        process_config_obj["regions"] = region_list
+                    if "pagination_attributes" in process_config_obj.keys():
+                        refined_pagination_attributes = {}
+                        for pagination_attribute in process_config_obj["pagination_attributes"]:
+                            if pagination_attribute["is_visible"].upper() == "YES":
+                                pagination_attribute_flag = False
+                            else:
+                                refined_pagination_attributes[pagination_attribute["attribute_name"]
+                                                              ] = pagination_attribute["attribute_value"]
+                                process_config_obj["pagination_attributes"] = refined_pagination_attributes
+                    # Each job gets own attributes, shared attributes are not modified
+                    process_config_obj["attributes"] = dict(attributes)
+                    process_config_obj["attributes"]["is_batch"] = "True"
+                    # Local files of accounts running same function at same time don't clash
+                    process_config_obj["attributes"]["file_prefix"] = account_selected
+                    if pagination_attribute_flag:
+                        batch_jobs.append(process_config_obj)
+    return batch_jobs
+
+
+def get_job_key(process_config_obj):
+    return (process_config_obj["accounts"][0], process_config_obj["service_name"])
+
+
+def interleave_services(batch_jobs):
+    """
+    Order jobs round robin over accounts and services, so jobs of one account or
+    service are not all queued before others
+    """
+    service_jobs = {}
+    for process_config_obj in batch_jobs:
+        service_jobs.setdefault(get_job_key(process_config_obj), []).append(process_config_obj)
+    ordered_jobs = []
+    for jobs in itertools.zip_longest(*service_jobs.values()):
+        ordered_jobs.extend([job for job in jobs if job is not None])
+    return ordered_jobs
+
+
+def run_batch_job(process_config_obj):
+    start_time = time.time()
+    print("Start Processing for account : {} service : {} function :{}".format(
+        process_config_obj["accounts"][0], process_config_obj["service_name"], process_config_obj["function_name"]))
+    # core processor process the service
+    core_processor.process(process_config_obj)
+    print("Report generated for account {} service {} function {} :TIME Taken -->{}".format(
+        process_config_obj["accounts"][0], process_config_obj["service_name"],
+        process_config_obj["function_name"], (time.time() - start_time)))
+
+
+def get_runnable_jobs(pending_jobs, running_count, account_running, service_running,
+                      max_workers, account_limit, service_limit):
+    """
+    Pick pending jobs which can start now without exceeding any limit, in pending order
+    :param account_running: running jobs by account, updated for picked jobs
+    :param service_running: running jobs by (account, service), updated for picked jobs
+    :return: list of jobs to start and list of jobs still pending
+    """
+    runnable_jobs = []
+    waiting_jobs = []
+    for process_config_obj in pending_jobs:
+        account, job_key = process_config_obj["accounts"][0], get_job_key(process_config_obj)
+        if (running_count + len(runnable_jobs) < max_workers and account_running[account] < account_limit
+                and service_running[job_key] < service_limit):
+            account_running[account] += 1
+            service_running[job_key] += 1
+            runnable_jobs.append(process_config_obj)
+        else:
+            waiting_jobs.append(process_config_obj)
+    return runnable_jobs, waiting_jobs
+
+
+def process(accounts_selected):
+    """
+    Run all eligible functions of selected accounts concurrently
+    Sessions, clients and region catalogs are shared by all accounts of the batch
+    Total concurrency is limited by RESOURCE_LISTER_BATCH_CONCURRENCY (default 8),
+    concurrency of each account by RESOURCE_LISTER_BATCH_ACCOUNT_CONCURRENCY (default 4)
+    and of each service in an account by RESOURCE_LISTER_BATCH_SERVICE_CONCURRENCY (default 2)
+    so service API quotas are not exhausted by one service
+    :param accounts_selected: account id or list of account ids
+    """
+    if isinstance(accounts_selected, str):
+        accounts_selected = [accounts_selected]
+    begin_time = time.time()
+    batch_jobs = interleave_services(get_batch_jobs(accounts_selected))
+    max_workers = get_env_limit("RESOURCE_LISTER_BATCH_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY)
+    account_limit = get_env_limit("RESOURCE_LISTER_BATCH_ACCOUNT_CONCURRENCY",
+                                  DEFAULT_BATCH_ACCOUNT_CONCURRENCY)
+    service_limit = get_env_limit("RESOURCE_LISTER_BATCH_SERVICE_CONCURRENCY",
+                                  DEFAULT_BATCH_SERVICE_CONCURRENCY)
+    count = 0
+    failed_count = 0
+    pending_jobs = batch_jobs
+    running_jobs = {}
+    account_running = collections.Counter()
+    service_running = collections.Counter()
+    # Jobs are submitted only when their account and service limits allow them to start,
+    # so no worker sits idle waiting for a limit
+    # Batch workers only wait on account x region tasks, which run on TaskScheduler pool
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                               thread_name_prefix="resource_lister_batch") as executor:
+        while pending_jobs or running_jobs:
+            runnable_jobs, pending_jobs = get_runnable_jobs(pending_jobs, len(running_jobs), account_running,
+                                                            service_running, max_workers, account_limit,
+                                                            service_limit)
+            for process_config_obj in runnable_jobs:
+                running_jobs[executor.submit(run_batch_job, process_config_obj)] = process_config_obj
+            done, _ = concurrent.futures.wait(running_jobs, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                process_config_obj = running_jobs.pop(future)
+                account_running[process_config_obj["accounts"][0]] -= 1
+                service_running[get_job_key(process_config_obj)] -= 1
+                try:
+                    future.result()
                     count += 1
+                except Exception as err:
+                    # One failing function doesn't stop the batch
+                    failed_count += 1
+                    logger.error("Batch failed for account {} service {} function {} : {}".format(
+                        process_config_obj["accounts"][0], process_config_obj["service_name"],
+                        process_config_obj["function_name"], err))
+    print("Batch completed : Number of accounts  --> {} ".format(len(accounts_selected)))
     print("Batch completed : Number of functions  --> {} ".format(count))
+    if failed_count:
+        print("Batch completed : Number of failed functions  --> {} ".format(failed_count))
     print("Batch completed : Took TIME --> {} ".format((time.time() - begin_time)))
-
-
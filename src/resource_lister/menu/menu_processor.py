@@ -3,11 +3,8 @@ import os
 import sys
 import logging
 import argparse
-import resource_lister.util.setup as setup
 import resource_lister.menu.menu_util as menu_util
-import resource_lister.menu.batch_processing as batch_processing
-import resource_lister.processor.core_processor as core_processor
-logging.basicConfig(level=logging.ERROR)
+import resource_lister.api as api
 logger = logging.getLogger()
 
 
@@ -26,8 +23,11 @@ on configured accounts.These API calls will applied to your API Account Quotas.
 
 def setup_args():
     parser = argparse.ArgumentParser(description='List AWS resources non-interactively.')
-    parser.add_argument('--service', type=str, required=True, help='AWS service name')
-    parser.add_argument('--option', type=int, required=True, help='Option number for the service')
+    parser.add_argument('--service', type=str, required=True, action='append',
+                        help='AWS service name, repeat to run several services')
+    parser.add_argument('--option', type=str, required=True, action='append',
+                        help='Option number, range (1-15), comma separated list or "all". '
+                             'One value applies to every service, else one per --service')
     parser.add_argument('--accounts', type=str, required=True, help='Comma separated account IDs or "ALL"')
     parser.add_argument('--regions', type=str, required=False, help='Comma separated region names or "ALL"')
     parser.add_argument('--output', type=str, required=True, help='Output type: print, file, or s3')
@@ -83,12 +83,16 @@ def process(args):
 
 def print_configure_utility():
     attributes = menu_util.MenuData.get_attributes()
-    CONFIGURATION = "CURRENT CONFIGURATIONS :\n  Format Type (csv/json) : {} \n  Output To (print/file/s3) :{}\n  Generate only required Columns (yes/no): {}\n  Generate seperate file for each AWS Account (yes/no) : {}\n  S3 Bucket : {}\n".format(
-        attributes["format_type"], attributes["output_to"], attributes["required"], attributes["account_split"], attributes["s3_bucket"])
+    CONFIGURATION = "CURRENT CONFIGURATIONS :\n  Format Type (csv/json) : {} \n  Output To (print/file/s3) :{}\n  Generate only required Columns (yes/no): {}\n  Generate seperate file for each AWS Account (yes/no) : {}\n  S3 Bucket : {}\n  Generate child tables for list attributes (yes/no) : {}\n".format(
+        attributes["format_type"], attributes["output_to"], attributes["required"], attributes["account_split"], attributes["s3_bucket"],
+        attributes.get("child_tables", "no"))
     print(CONFIGURATION)
 
 
 def process_help():
+    # Setup menus and batch processing are imported only for interactive help
+    import resource_lister.util.setup as setup
+    import resource_lister.menu.batch_processing as batch_processing
     in_process_help = True
     while in_process_help:
         print_help()
@@ -185,32 +189,120 @@ def process_help():
 #                 print("Please configure Master Account")
 
 def process_input(args):
-    args = setup_args()
+    services = [service.lower() for service in args.service]
+    if len(services) == 1:
+        if services[0] == "help":
+            process_help()
+            return
+        elif services[0] == "0":
+            return  # Exit the function if the service input is '0'
+    if len(args.option) == 1:
+        option_values = args.option * len(services)
+    elif len(args.option) == len(services):
+        option_values = args.option
+    else:
+        print("Please enter one --option for all services or one --option per --service")
+        return
 
-    service = args.service.lower()
-    if service == "help":
-        process_help()
+    service_options = []
+    for service, option_value in zip(services, option_values):
+        menu_list = menu_util.MenuData().search_menu_data(service)
+        if not menu_list:
+            print(f"Invalid service {service} selected. Please try again with any of the following services:")
+            menu_util.print_services()
+            return
+        menu_util.print_menu_data(menu_list, service)
+        try:
+            options = expand_options(option_value, len(menu_list))
+        except ValueError as err:
+            print(err)
+            return
+        # -1 exits without processing the service
+        if options:
+            service_options.append((service, options))
+    if not service_options:
         return
-    elif service == "0":
-        return  # Exit the function if the service input is '0'
-    
+    # All options run concurrently in this process sharing sessions and clients
+    results = api.run_services(service_options, args.accounts, args.regions)
+    for service, option_results in results.items():
+        for option, status in option_results.items():
+            print("RESULT : service {} option {} : {}".format(service, option, status))
+
+
+def expand_options(option_value, option_count):
+    """
+    :param option_value: option number, menu_index, range like 1-15, comma seperated list of them, all or -1
+    :param option_count: number of options of service, numbers and ranges outside 1 to option_count raise ValueError
+    :return: list of options in given order without duplicates, empty list for -1 (exit)
+    """
+    option_value = str(option_value).strip()
+    if option_value == "-1":
+        return []
+    if option_value.lower() == "all":
+        return [str(i) for i in range(1, option_count + 1)]
+    options = []
+    for token in option_value.split(","):
+        token = token.strip()
+        if "-" in token and token.replace("-", "").isdigit():
+            start, end = token.split("-", 1)
+            if not start or not end or not 1 <= int(start) <= int(end) <= option_count:
+                raise ValueError("Invalid option range {}, options are 1 to {}".format(token, option_count))
+            tokens = [str(i) for i in range(int(start), int(end) + 1)]
+        else:
+            if token.isdigit() and not 1 <= int(token) <= option_count:
+                raise ValueError("Invalid option {}, options are 1 to {}".format(token, option_count))
+            tokens = [token]
+        for option in tokens:
+            if option and option not in options:
+                options.append(option)
+    if len(options) == 0:
+        raise ValueError("Invalid option {}".format(option_value))
+    return options
+
+
+def get_process_config(service, option, accounts, regions=None, output=None):
+    """
+    Build process_config for service option without user prompts
+    :param service: service name like ec2
+    :param option: option number or menu_index of service function
+    :param accounts: comma seperated account ids or ALL
+    :param regions: comma seperated regions or ALL, default ALL for regional functions
+    :param output: print, file or s3, default is configured output_to
+    :return: process_config for core_processor
+    """
     menu_list = menu_util.MenuData().search_menu_data(service)
     if not menu_list:
-        print(f"Invalid service {service} selected. Please try again with any of the following services:")
-        menu_util.print_services()
-        return
-    
-    # Process service functions with the selected option
-    process_config = process_service_functions(menu_list, service, str(args.option))
-    if process_config:
-        process_config = process_accounts(process_config, args.accounts)
-    if process_config and args.regions:
-        process_config = process_regions(process_config, args.regions)
-    if process_config:
-        process_config = process_paginatio_attributes(process_config)
-    if process_config:
-        process_config["attributes"] = dict(menu_util.MenuData.get_attributes())
-        core_processor.process(process_config)
+        raise ValueError("Invalid service {} selected".format(service))
+    menu_item = validate_menu(str(option).strip(), menu_list)
+    if menu_item is None:
+        raise ValueError("Invalid option {} selected for service {}".format(option, service))
+    process_config = menu_util.MenuData.get_menu_item(menu_item)
+    account_list = menu_util.MenuData.get_account_list()
+    if len(account_list) == 0:
+        raise ValueError('No account id to select')
+    if process_config["is_multi_account_support"] == "yes":
+        if accounts.strip().upper() == "ALL":
+            process_config["accounts"] = account_list
+        else:
+            process_config["accounts"] = validated_list_value(accounts.split(','), account_list)
+            if len(process_config["accounts"]) == 0:
+                raise ValueError("Please enter valid accounts : Valid accounts are {}".format(account_list))
+    else:
+        # customized version: make first available accounts selected
+        process_config["accounts"] = [account_list[0]]
+    if process_config["is_regional"] == "yes":
+        region_list = menu_util.MenuData.get_region_list()
+        if regions is None or regions.strip().upper() == "ALL":
+            process_config["regions"] = region_list
+        else:
+            process_config["regions"] = validated_list_value(regions.split(','), region_list)
+            if len(process_config["regions"]) == 0:
+                raise ValueError("Please enter valid regions : Valid regions are {}".format(region_list))
+    process_config = process_paginatio_attributes(process_config)
+    process_config["attributes"] = dict(menu_util.MenuData.get_attributes())
+    if output:
+        process_config["attributes"]["output_to"] = output
+    return process_config
 
 
 def process_service_functions(menu_list, input_value, option_selected_value):
@@ -353,7 +445,7 @@ def validate_menu(menu_item, menu_list):
     else:
         if menu_item.isdigit():
             menu_item_index = int(menu_item)-1
-            if menu_item_index <= len(menu_list):
+            if 0 <= menu_item_index < len(menu_list):
                 valid_menu_item = menu_list[menu_item_index]["menu_index"]
     return valid_menu_item
 
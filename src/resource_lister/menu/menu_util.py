@@ -1,12 +1,8 @@
 
-import os
 import logging
-import json
-from resource_lister.session_mgr.iam_session_mgr import AccountConfig
-from resource_lister.session_mgr.iam_session_mgr import Region
 import resource_lister.config_mgr.config_util as config_util
+from resource_lister.util.config_registry import ConfigRegistry
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
 
@@ -32,8 +28,6 @@ def print_disclaimer():
 
 
 class MenuData():
-    __menu_data = None
-    __menu_index_data = None
     __service_list = []
     __account_list = None
     __region_list = None
@@ -41,24 +35,13 @@ class MenuData():
 
     @classmethod
     def load_data(cls):
-        """ Load config values from menu_config.json"""
+        """ Load config values from menu_config.json through compiled config registry"""
         logger.debug("loading Data for menu_config {}...")
         try:
-            dir_path = os.path.dirname(os.path.abspath(__file__))
-            file_path = os.path.join(dir_path, "menu_config.json")
-            f = open(file_path)
-            temp_data = json.load(f)
-            MenuData.__menu_data = temp_data["menus"]
-            MenuData.__menu_index_data = {}
-            # Update Menu index data and service list
-            for _menu in MenuData.__menu_data:
-                MenuData.__menu_index_data[_menu["menu_index"]] = _menu
-                if _menu["service_name"] not in MenuData.__service_list:
-                    MenuData.__service_list.append(_menu["service_name"])
-            f.close()
-            MenuData.__service_list.sort()
-            MenuData.__account_list = AccountConfig.get_account_list()
-            MenuData.__region_list = Region.get_regions()
+            ConfigRegistry.reload()
+            MenuData.__service_list = ConfigRegistry.get_service_list()
+            # Reload accounts on next use as account setup menu may have changed them
+            MenuData.__account_list = None
 
         except FileNotFoundError as err:
             logger.error(
@@ -66,64 +49,59 @@ class MenuData():
             raise err
 
     def search_menu_data(self, menu_str):
+        """
+        :param menu_str: service name or service number
+        :return: menu items of service, items are shared and must not be modified
+        """
         result = None
-        if MenuData.__menu_data is None:
-            MenuData.load_data()
         if menu_str is not None:
             menu_str = menu_str.strip().lower()
-            service_list = MenuData.get_service_list()
-            # if user types in service name
-            if menu_str in service_list:
-                result = []
-                for _menu in MenuData.__menu_data:
-                    if menu_str == _menu["service_name"]:
-                        result.append(dict(_menu))
-            else:
-                # if user types in service id
-                if menu_str.isdigit():
-                    menu_item_index = int(menu_str)-1
-                    if menu_item_index <= len(service_list):
-                        service_name = service_list[menu_item_index]
-                        result = []
-                        for _menu in MenuData.__menu_data:
-                            if service_name == _menu["service_name"]:
-                                result.append(dict(_menu))
+            result = ConfigRegistry.get_service_menus(menu_str)
+            # if user types in service id
+            if result is None and menu_str.isdigit():
+                service_list = MenuData.get_service_list()
+                menu_item_index = int(menu_str)-1
+                if 0 <= menu_item_index < len(service_list):
+                    result = ConfigRegistry.get_service_menus(service_list[menu_item_index])
 
         return result
 
     @classmethod
     def get_menu_item(cls, menu_index):
         menu_item = None
-        if MenuData.__menu_index_data is None:
-            MenuData.load_data()
         if menu_index is None:
             raise ValueError("Please select valid option :")
         else:
             menu_index = menu_index.strip().lower()
-            try:
-                menu_item = dict(MenuData.__menu_index_data[menu_index])
-            except KeyError as err:
-                logger.error(err)
+            menu_item = ConfigRegistry.get_menu_item(menu_index)
+            if menu_item is None:
+                logger.error(menu_index)
                 raise ValueError("Please select valid option")
+            menu_item = dict(menu_item)
 
         return menu_item
 
     @classmethod
     def get_account_list(cls):
+        # Accounts (and boto3) are loaded only when a menu needs them
         if MenuData.__account_list is None:
-            MenuData.load_data()
+            from resource_lister.session_mgr.iam_session_mgr import AccountConfig
+            AccountConfig.load_data()
+            MenuData.__account_list = AccountConfig.get_account_list()
         return MenuData.__account_list
 
     @classmethod
     def get_region_list(cls):
+        # Regions are needed only for regional menu items, load them on first use
         if MenuData.__region_list is None:
-            MenuData.load_data()
+            from resource_lister.session_mgr.iam_session_mgr import Region
+            MenuData.__region_list = Region.get_regions()
         return MenuData.__region_list
 
     @classmethod
     def get_service_list(cls):
         if len(MenuData.__service_list) == 0:
-            MenuData.load_data()
+            MenuData.__service_list = ConfigRegistry.get_service_list()
         return MenuData.__service_list
 
     @classmethod
@@ -3,17 +3,16 @@ Library to process functions which are global and doesn't have pagination suppor
 example : s3 list_buckets
 """
 import botocore
-from resource_lister.util.session_util import SessionHandler
+from resource_lister.util.client_pool import ClientPool
+from resource_lister.util.task_scheduler import TaskScheduler
 from resource_lister.util.s3_util import S3Uploader
 from resource_lister.boto_formatter.service_formatter import service_response_formatter
 import logging
 import datetime
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
 def process(process_config):
-    object_list = []
     accounts = process_config["accounts"]
     service_name = process_config["service_name"]
     function_name = process_config["function_name"]
@@ -24,26 +23,25 @@ def process(process_config):
     pagination_attributes = None
     if "pagination_attributes" in process_config.keys():
         pagination_attributes = process_config["pagination_attributes"]
+    # Account level calls run concurrently on shared bounded worker pool
+    # Errors like invalid parameters are raised to caller as before
+    tasks = [(_account, service_name, function_name, current_date, pagination_attributes)
+             for _account in accounts]
+    task_results = TaskScheduler.run(process_global_list, tasks, raise_errors=True)
 # YES: generate seperate output file for each account
     if attributes["account_split"].lower() == "yes":
-        for _account in accounts:
-            _session = SessionHandler.get_session(_account)
-            object_list = []
-            object_list.append(process_global_list(
-                _session, _account, service_name, function_name, current_date, pagination_attributes,))
+        for task, result in task_results:
+            object_list = [result]
             process_result(process_config, service_response_formatter(
                 service_name, function_name, object_list, attributes))
 # NO: Generate Consolidated output for all the accounts
     else:
-        for _account in accounts:
-            _session = SessionHandler.get_session(_account)
-            object_list.append(process_global_list(
-                _session, _account, service_name, function_name, current_date, pagination_attributes))
+        object_list = [result for task, result in task_results]
         process_result(process_config, service_response_formatter(
             service_name, function_name, object_list, attributes))
 
 
-def process_global_list(_session, _account, service_name, function_name, current_date, pagination_attributes):
+def process_global_list(_account, service_name, function_name, current_date, pagination_attributes):
     """
     Process global service no paginates
     """
@@ -55,7 +53,7 @@ def process_global_list(_session, _account, service_name, function_name, current
         prefix_columns["Creation_Date"] = current_date
         prefix_columns["service_name"] = service_name
         prefix_columns["function_name"] = function_name
-        _session_client = _session.client(service_name)
+        _session_client = ClientPool.get_client(_account, service_name)
         if pagination_attributes:
             object_list = getattr(_session_client, function_name)(
                 **pagination_attributes)
@@ -1,15 +1,14 @@
 import botocore
-from resource_lister.util.session_util import SessionHandler
+from resource_lister.util.client_pool import ClientPool
+from resource_lister.util.task_scheduler import TaskScheduler
 from resource_lister.util.s3_util import S3Uploader
 from resource_lister.boto_formatter.service_formatter import service_response_formatter
 import logging
 import datetime
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
 
 def process(process_config):
-    object_list = []
     accounts = process_config["accounts"]
     service_name = process_config["service_name"]
     function_name = process_config["function_name"]
@@ -19,26 +18,25 @@ def process(process_config):
     pagination_attributes = None
     if "pagination_attributes" in process_config.keys():
         pagination_attributes = process_config["pagination_attributes"]
+    # Account level calls run concurrently on shared bounded worker pool
+    # Errors like invalid parameters are raised to caller as before
+    tasks = [(_account, service_name, function_name, current_date, pagination_attributes)
+             for _account in accounts]
+    task_results = TaskScheduler.run(process_global_list, tasks, raise_errors=True)
 # YES: generate seperate output file for each account
     if attributes["account_split"].lower() == "yes":
-        for _account in accounts:
-            _session = SessionHandler.get_session(_account)
-            object_list = []
-            object_list.append(process_global_list(
-                _session, _account, service_name, function_name, current_date, pagination_attributes))
+        for task, result in task_results:
+            object_list = [result]
             process_result(process_config, service_response_formatter(
                 service_name, function_name, object_list, attributes))
 # NO: Generate Consolidated output for all the accounts
     else:
-        for _account in accounts:
-            _session = SessionHandler.get_session(_account)
-            object_list.append(process_global_list(
-                _session, _account, service_name, function_name, current_date, pagination_attributes))
+        object_list = [result for task, result in task_results]
         process_result(process_config, service_response_formatter(
             service_name, function_name, object_list, attributes))
 
 
-def process_global_list(_session, _account, service_name, function_name, current_date, pagination_attributes):
+def process_global_list(_account, service_name, function_name, current_date, pagination_attributes):
     """
     Functions with Paginator
     """
@@ -50,11 +48,13 @@ def process_global_list(_session, _account, service_name, function_name, current
         prefix_columns["Creation_Date"] = current_date
         prefix_columns["service_name"] = service_name
         prefix_columns["function_name"] = function_name
-        service_func = _session.client(service_name)
+        service_func = ClientPool.get_client(_account, service_name)
         paginator = service_func.get_paginator(function_name)
         page_iterator = None
         if pagination_attributes:
             # AccountId attribute would be changed to current account value
+            # Copy attributes as tasks of all accounts share them
+            pagination_attributes = dict(pagination_attributes)
             for key in pagination_attributes:
                 if key == "AccountId":
                     pagination_attributes[key] = _account
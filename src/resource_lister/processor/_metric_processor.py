@@ -1,14 +1,91 @@
 import botocore
-import concurrent.futures
-from botocore.config import Config
 from resource_lister.boto_formatter.service_formatter import service_response_formatter
-from resource_lister.util.session_util import SessionHandler
+from resource_lister.util.client_pool import ClientPool
+from resource_lister.util.account_regions import AccountRegions
+from resource_lister.util.task_scheduler import TaskScheduler
+from resource_lister.util.discovery_cache import DiscoveryCache
 from resource_lister.util.s3_util import S3Uploader
 import logging
 import datetime
-logging.basicConfig(level=logging.ERROR)
+import os
+import threading
 logger = logging.getLogger()
 
+# GetMetricData accepts at most 500 metric queries per request
+MAX_METRIC_QUERIES = 500
+
+# Map function names to actual AWS metric names for RDS
+RDS_METRIC_NAMES = {
+    "rds_cpu_utilization": "CPUUtilization",
+    "rds_database_connections": "DatabaseConnections",
+    "rds_freeable_memory": "FreeableMemory",
+    "rds_free_storage_space": "FreeStorageSpace",
+    "rds_read_iops": "ReadIOPS",
+    "rds_write_iops": "WriteIOPS",
+    "rds_read_throughput": "ReadThroughput",
+    "rds_write_throughput": "WriteThroughput",
+    "rds_replica_lag": "ReplicaLag",
+    "rds_aurora_capacity_units": "ServerlessDatabaseCapacity"
+}
+
+# GetMetricData results have no Unit, rows of single metric carry Unit like get_metric_statistics datapoints
+METRIC_UNITS = {
+    "CPUUtilization": "Percent",
+    "mem_used_percent": "Percent",
+    "NetworkIn": "Bytes",
+    "NetworkOut": "Bytes",
+    "NetworkPacketsIn": "Count",
+    "NetworkPacketsOut": "Count",
+    "VolumeReadOps": "Count",
+    "VolumeWriteOps": "Count",
+    "VolumeReadBytes": "Bytes",
+    "VolumeWriteBytes": "Bytes",
+    "CPUReservation": "Percent",
+    "MemoryReservation": "Percent",
+    "DatabaseConnections": "Count",
+    "FreeableMemory": "Bytes",
+    "FreeStorageSpace": "Bytes",
+    "ReadIOPS": "Count/Second",
+    "WriteIOPS": "Count/Second",
+    "ReadThroughput": "Bytes/Second",
+    "WriteThroughput": "Bytes/Second",
+    "ReplicaLag": "Seconds",
+    "ServerlessDatabaseCapacity": "None"
+}
+
+
+def get_resource_limit():
+    """
+    :return: max resources queried per run, RESOURCE_LISTER_METRIC_RESOURCE_LIMIT (default no limit)
+    """
+    try:
+        limit = int(os.getenv("RESOURCE_LISTER_METRIC_RESOURCE_LIMIT", 0))
+    except ValueError:
+        logger.warning("RESOURCE_LISTER_METRIC_RESOURCE_LIMIT is not a number, resources are not limited")
+        return None
+    return limit if limit > 0 else None
+
+
+class ResourceLimit():
+    """ Resources left in a run, shared by its account x region tasks"""
+
+    def __init__(self, limit=None):
+        self.__remaining = limit
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        :return: True if one more resource can be queried
+        """
+        if self.__remaining is None:
+            return True
+        with self.__lock:
+            if self.__remaining <= 0:
+                return False
+            self.__remaining -= 1
+            return True
+
+
 def process(process_config):
     accounts = process_config["accounts"]
     regions = process_config["regions"]
@@ -16,238 +93,286 @@ def process(process_config):
     function_name = process_config["function_name"]
     attributes = process_config["attributes"]
     attributes["pagination"] = "True"
-    metric_parameters = process_config.get("metric_parameters", {})
-    pagination_attributes = None
+    # Copy as menu data is shared by concurrent runs
+    metric_parameters = dict(process_config.get("metric_parameters", {}))
     current_date = datetime.datetime.now().strftime("%m/%d/%Y")
-    if "pagination_attributes" in process_config.keys():
-        pagination_attributes = process_config["pagination_attributes"]
 
-    object_list = []
     if metric_parameters["Namespace"] == "AWS/EC2" or metric_parameters["Namespace"] == "CWAgent":
-        intances = get_instance_ids(accounts, regions)
+        fetch_function = fetch_instance_ids
         dimension_name = "InstanceId"
     elif metric_parameters["Namespace"] == "AWS/EBS":
-        intances = get_volume_ids(accounts, regions)
+        fetch_function = fetch_volume_ids
         dimension_name = "VolumeId"
     elif metric_parameters["Namespace"] == "AWS/ECS":
-        intances = get_cluster_names(accounts, regions)
+        fetch_function = fetch_cluster_names
         dimension_name = "ClusterName"
     elif metric_parameters["Namespace"] == "AWS/RDS":
-        intances = get_rds_instance_ids(accounts, regions)
+        fetch_function = fetch_rds_instance_ids
         dimension_name = "DBInstanceIdentifier"
     else:
         logger.error(f"Namespace '{metric_parameters['Namespace']}' not supported")
         raise Exception(f"Namespace '{metric_parameters['Namespace']}' not supported")
 
-    if intances:
-        object_list = []
-        for intance in intances:
-            # Map function names to actual AWS metric names for RDS
-            if metric_parameters["Namespace"] == "AWS/RDS":
-                metric_name_mapping = {
-                    "rds_cpu_utilization": "CPUUtilization",
-                    "rds_database_connections": "DatabaseConnections", 
-                    "rds_freeable_memory": "FreeableMemory",
-                    "rds_free_storage_space": "FreeStorageSpace",
-                    "rds_read_iops": "ReadIOPS",
-                    "rds_write_iops": "WriteIOPS",
-                    "rds_read_throughput": "ReadThroughput",
-                    "rds_write_throughput": "WriteThroughput",
-                    "rds_replica_lag": "ReplicaLag",
-                    "rds_aurora_capacity_units": "ServerlessDatabaseCapacity"
-                }
-                actual_metric_name = metric_name_mapping.get(function_name, function_name)
-                logger.info(f"DEBUG: Mapping function_name '{function_name}' to metric_name '{actual_metric_name}'")
-            else:
-                actual_metric_name = function_name
-            
-            metric_parameters["MetricName"] = actual_metric_name
-            metric_parameters["Dimensions"] = [{"Name": dimension_name, "Value": intance}]
-            object_list.extend(process_metrics(accounts, regions, service_name, function_name, intance, metric_parameters, current_date))
-        process_result(process_config, service_response_formatter(service_name, function_name, object_list, attributes))
-    else:
-        logger.info(f"DEBUG: No {metric_parameters['Namespace']} instances found, processing empty result")
-        process_result(process_config, service_response_formatter(service_name, function_name, [], attributes))
-
-def get_instance_ids(accounts, regions):
-    instance_ids = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = []
-        for account in accounts:
-            for region in regions:
-                futures.append(executor.submit(fetch_instance_ids, SessionHandler.get_new_session(account), region))
-        
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                result = future.result()
-                instance_ids.extend(result)
-                if len(instance_ids) >= 60:
-                    return instance_ids[:60]
-            except Exception as exc:
-                logger.error(exc)
-    return instance_ids[:60]
-
-def fetch_instance_ids(session, region):
-    ec2_client = session.client("ec2", config=Config(region_name=region))
+    metric_outputs = get_metric_outputs(function_name, metric_parameters)
+    output_results = process_metrics(accounts, regions, fetch_function, service_name, metric_outputs,
+                                     dimension_name, metric_parameters, current_date,
+                                     ResourceLimit(get_resource_limit()))
+    for output_function_name, metric_names in metric_outputs:
+        object_list = output_results.get(output_function_name, [])
+        if not object_list:
+            logger.info(f"DEBUG: No {metric_parameters['Namespace']} {output_function_name} datapoints found, processing empty result")
+        # Per metric outputs are saved and uploaded like their single metric options
+        output_process_config = dict(process_config)
+        output_process_config["function_name"] = output_function_name
+        process_result(output_process_config, service_response_formatter(
+            service_name, output_function_name, object_list, attributes))
+
+
+def get_metric_name(function_name, namespace):
+    if namespace == "AWS/RDS":
+        return RDS_METRIC_NAMES.get(function_name, function_name)
+    return function_name
+
+
+def get_metric_function_name(metric_name, namespace):
+    """
+    :return: function name of single metric option, like rds_cpu_utilization for AWS/RDS CPUUtilization
+    """
+    if namespace == "AWS/RDS":
+        for function_name, rds_metric_name in RDS_METRIC_NAMES.items():
+            if rds_metric_name == metric_name:
+                return function_name
+    return metric_name
+
+
+def get_metric_outputs(function_name, metric_parameters):
+    """
+    Single metric option has metric of its function_name
+    Multi metric option lists MetricNames, fetched in same requests and written by MetricOutput
+        wide : one output of function_name with <MetricName>_<Statistic> columns (default)
+        per_metric : one output per metric like its single metric option
+    :return: list of (output function name, list of metric names)
+    """
+    namespace = metric_parameters["Namespace"]
+    metric_names = metric_parameters.get("MetricNames")
+    if not metric_names:
+        return [(function_name, [get_metric_name(function_name, namespace)])]
+    if metric_parameters.get("MetricOutput", "wide") == "per_metric":
+        return [(get_metric_function_name(metric_name, namespace), [metric_name]) for metric_name in metric_names]
+    return [(function_name, list(metric_names))]
+
+
+def fetch_instance_ids(account, region):
+    ec2_client = ClientPool.get_client(account, "ec2", region)
     paginator = ec2_client.get_paginator("describe_instances")
-    instance_ids = []
     for page in paginator.paginate():
         for reservation in page["Reservations"]:
             for instance in reservation["Instances"]:
-                instance_ids.append(instance["InstanceId"])
-                if len(instance_ids) >= 60:
-                    return instance_ids
-    return instance_ids
-
-def get_cluster_names(accounts, regions):
-    cluster_names = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = []
-        for account in accounts:
-            for region in regions:
-                futures.append(executor.submit(fetch_cluster_names, SessionHandler.get_new_session(account), region))
-        
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                result = future.result()
-                cluster_names.extend(result)
-                if len(cluster_names) >= 60:
-                    return cluster_names[:60]
-            except Exception as exc:
-                logger.error(exc)
-    return cluster_names[:60]
-
-def fetch_cluster_names(session, region):
-    ecs_client = session.client("ecs", config=Config(region_name=region))
-    paginator = ecs_client.get_paginator('list_clusters')
-    cluster_names = []
+                yield instance["InstanceId"]
+
 
+def fetch_cluster_names(account, region):
+    ecs_client = ClientPool.get_client(account, "ecs", region)
+    paginator = ecs_client.get_paginator('list_clusters')
     for page in paginator.paginate():
         cluster_arns = page.get('clusterArns', [])
-        
-        for cluster_arn in cluster_arns:
-            # Describe the cluster to get its name
-            cluster_info = ecs_client.describe_clusters(clusters=[cluster_arn])
-            cluster = cluster_info['clusters'][0]
-            cluster_name = cluster['clusterName']
-            cluster_names.append(cluster_name)
-            if len(cluster_names) >= 60:
-                return cluster_names
-    
-    return cluster_names
-
-def get_volume_ids(accounts, regions):
-    volume_ids = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = []
-        for account in accounts:
-            for region in regions:
-                # Assume SessionHandler.get_new_session handles creating sessions with appropriate credentials
-                futures.append(executor.submit(fetch_volume_ids, SessionHandler.get_new_session(account), region))
-        
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                result = future.result()
-                volume_ids.extend(result)
-                if len(volume_ids) >= 60:
-                    return volume_ids[:60]
-            except Exception as exc:
-                logger.error(exc)
-    return volume_ids[:60]
-
-def get_rds_instance_ids(accounts, regions):
-    rds_instance_ids = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = []
-        for account in accounts:
-            for region in regions:
-                # Assume SessionHandler.get_new_session handles creating sessions with appropriate credentials
-                futures.append(executor.submit(fetch_rds_instance_ids, SessionHandler.get_new_session(account), region))
-        
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                result = future.result()
-                rds_instance_ids.extend(result)
-                if len(rds_instance_ids) >= 60:
-                    return rds_instance_ids[:60]
-            except Exception as exc:
-                logger.error(f"DEBUG: Exception in get_rds_instance_ids: {exc}")
-    return rds_instance_ids[:60]
-
-def fetch_rds_instance_ids(session, region):
-    try:
-        rds_client = session.client("rds", config=Config(region_name=region))
-        paginator = rds_client.get_paginator("describe_db_instances")
-        rds_instance_ids = []
-        
-        for page in paginator.paginate():
-            for instance in page['DBInstances']:
-                instance_id = instance['DBInstanceIdentifier']
-                rds_instance_ids.append(instance_id)
-                if len(rds_instance_ids) >= 60:
-                    return rds_instance_ids
-    except Exception as e:
-        logger.error(f"DEBUG: Exception in fetch_rds_instance_ids: {e}")
-    return rds_instance_ids
+        if not cluster_arns:
+            continue
+        # Describe clusters of page to get their names, list_clusters page has at most 100 clusters
+        cluster_info = ecs_client.describe_clusters(clusters=cluster_arns)
+        for cluster in cluster_info['clusters']:
+            yield cluster['clusterName']
+
+
+def fetch_rds_instance_ids(account, region):
+    # Errors are logged by process_location, failed discovery is not cached
+    rds_client = ClientPool.get_client(account, "rds", region)
+    paginator = rds_client.get_paginator("describe_db_instances")
+    for page in paginator.paginate():
+        for instance in page['DBInstances']:
+            yield instance['DBInstanceIdentifier']
 
-def fetch_volume_ids(session, region):
-    ec2_client = session.client("ec2", config=Config(region_name=region))
+
+def fetch_volume_ids(account, region):
+    ec2_client = ClientPool.get_client(account, "ec2", region)
     paginator = ec2_client.get_paginator("describe_volumes")
-    volume_ids = []
     for page in paginator.paginate():
         for volume in page['Volumes']:
-            volume_ids.append(volume['VolumeId'])
-            if len(volume_ids) >= 60:
-                return volume_ids
-    return volume_ids
-
-def process_metrics(accounts, regions, service_name, function_name, intance, metric_parameters, current_date):
-    metrics_results = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = []
-        for account in accounts:
-            for region in regions:
-                futures.append(executor.submit(fetch_metrics, SessionHandler.get_new_session(account), region, account, service_name, function_name, intance, metric_parameters, current_date))
-        
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                result = future.result()
-                metrics_results.append(result)
-            except Exception as exc:
-                logger.error(exc)
-    return metrics_results
-
-def fetch_metrics(session, region, account, service_name, function_name, intance, metric_parameters, current_date):
-    prefix_columns = dict()
-    prefix_columns["Account"] = account
-    prefix_columns["Region"] = region
-    prefix_columns["Creation_Date"] = current_date
-    prefix_columns["service_name"] = service_name
-    prefix_columns["function_name"] = function_name
-    prefix_columns["instance_id"] = intance
-
-    result = dict()
-    object_list = []
-    cw_client = session.client("cloudwatch", config=Config(region_name=region))
-    
+            yield volume['VolumeId']
+
+
+def process_metrics(accounts, regions, fetch_function, service_name, metric_outputs, dimension_name, metric_parameters,
+                    current_date, resource_limit=None):
+    """
+    Discover resources and query their metrics, one task per account x region
+    :param fetch_function: generator of resource ids in account x region
+    :param metric_outputs: list of (output function name, list of metric names)
+    :param resource_limit: optional ResourceLimit shared by tasks
+    :return: dictionary of output function name and list of prefix_columns and Datapoints
+    """
+    if resource_limit is None:
+        resource_limit = ResourceLimit()
+    account_regions = AccountRegions.get_account_region_map(accounts, regions)
+    # Same time window for all account x region tasks
+    end_time = datetime.datetime.utcnow()
+    start_time = end_time - datetime.timedelta(hours=24)
+    tasks = [(account, region, fetch_function, service_name, metric_outputs, dimension_name, metric_parameters,
+              current_date, start_time, end_time, resource_limit)
+             for account in accounts for region in account_regions[account]]
+    output_results = dict()
+    for task, result in TaskScheduler.run(process_location, tasks):
+        for output_function_name, object_list in result.items():
+            output_results.setdefault(output_function_name, []).extend(object_list)
+    return output_results
+
+
+def process_location(account, region, fetch_function, service_name, metric_outputs, dimension_name, metric_parameters,
+                     current_date, start_time, end_time, resource_limit):
+    """
+    Stream resources discovered in account x region into GetMetricData requests,
+    only one request worth of resource ids is held at a time
+    Discovered ids are shared with other metric options of same dimension through DiscoveryCache
+    :return: dictionary of output function name and list of prefix_columns and Datapoints
+    """
+    metric_count = sum(len(metric_names) for output_function_name, metric_names in metric_outputs)
+    batch_size = max(1, MAX_METRIC_QUERIES // max(1, metric_count * len(metric_parameters["Statistics"])))
+    output_results = dict()
+    intances = []
+
+    def query_batch():
+        result = fetch_metric_data(account, region, service_name, metric_outputs, intances, dimension_name,
+                                   metric_parameters, current_date, start_time, end_time)
+        for output_function_name, object_list in result.items():
+            output_results.setdefault(output_function_name, []).extend(object_list)
+
+    resource_ids = DiscoveryCache.get_resources(account, region, dimension_name, fetch_function)
     try:
-        logger.info(f"DEBUG: Calling get_metric_statistics with MetricName={metric_parameters['MetricName']}, Namespace={metric_parameters['Namespace']}")
-        response = cw_client.get_metric_statistics(
-            Namespace=metric_parameters["Namespace"],
-            MetricName=metric_parameters["MetricName"],
-            Dimensions=metric_parameters["Dimensions"],
-            StartTime=datetime.datetime.utcnow() - datetime.timedelta(hours=24),
-            EndTime=datetime.datetime.utcnow(),
-            Period=metric_parameters["Period"],
-            Statistics=metric_parameters["Statistics"]
-        )
+        for intance in resource_ids:
+            if not resource_limit.acquire():
+                logger.info("Metric resource limit reached, {} {} is not fully queried".format(account, region))
+                break
+            intances.append(intance)
+            if len(intances) >= batch_size:
+                query_batch()
+                intances = []
     except Exception as e:
-        logger.error(f"DEBUG: Exception in fetch_metrics for {intance}: {e}")
-        response = {'Datapoints': []}
-    
-    result['prefix_columns'] = prefix_columns
-    result['result'] = [{'Datapoints': response['Datapoints']}]
-    return result
+        # Keep metrics of resources already discovered in this location
+        logger.error(f"DEBUG: Exception in discovery for {account} {region}: {e}")
+    finally:
+        # Discovery stopped by resource limit ends here, so waiting options don't wait for it
+        if hasattr(resource_ids, "close"):
+            resource_ids.close()
+    if intances:
+        query_batch()
+    return output_results
+
+
+def get_metric_queries(intances, dimension_name, metric_names, metric_parameters):
+    """
+    :return: list of (query id, intance, metric name, statistic) and list of MetricDataQueries
+    """
+    query_keys = []
+    queries = []
+    for intance in intances:
+        for metric_name in metric_names:
+            for statistic in metric_parameters["Statistics"]:
+                query_id = "q{}".format(len(queries))
+                query_keys.append((query_id, intance, metric_name, statistic))
+                queries.append({
+                    "Id": query_id,
+                    "MetricStat": {
+                        "Metric": {
+                            "Namespace": metric_parameters["Namespace"],
+                            "MetricName": metric_name,
+                            "Dimensions": [{"Name": dimension_name, "Value": intance}]
+                        },
+                        "Period": metric_parameters["Period"],
+                        "Stat": statistic
+                    },
+                    "ReturnData": True
+                })
+    return query_keys, queries
+
+
+def get_metric_data(cw_client, queries, start_time, end_time):
+    """
+    Call GetMetricData with at most MAX_METRIC_QUERIES queries per request and follow NextToken
+    Failed page is logged, values of pages and requests already read are kept
+    :return: dictionary of query id and list of (timestamp, value)
+    """
+    values = dict()
+    for index in range(0, len(queries), MAX_METRIC_QUERIES):
+        request = {
+            "MetricDataQueries": queries[index:index + MAX_METRIC_QUERIES],
+            "StartTime": start_time,
+            "EndTime": end_time,
+            "ScanBy": "TimestampAscending"
+        }
+        while True:
+            try:
+                response = cw_client.get_metric_data(**request)
+            except Exception as e:
+                logger.error(f"DEBUG: Exception in get_metric_data for queries {index} to "
+                             f"{index + len(request['MetricDataQueries']) - 1}: {e}")
+                break
+            for metric_data_result in response.get("MetricDataResults", []):
+                values.setdefault(metric_data_result["Id"], []).extend(
+                    zip(metric_data_result.get("Timestamps", []), metric_data_result.get("Values", [])))
+            if not response.get("NextToken"):
+                break
+            request["NextToken"] = response["NextToken"]
+    return values
+
+
+def fetch_metric_data(account, region, service_name, metric_outputs, intances, dimension_name, metric_parameters,
+                      current_date, start_time, end_time):
+    """
+    Query metrics of all intances in one account x region, all metrics share same requests
+    Output of one metric has Statistic and Unit columns like get_metric_statistics,
+    output of several metrics has <MetricName>_<Statistic> columns
+    :return: dictionary of output function name and list of prefix_columns and Datapoints, one per intance having datapoints
+    """
+    metric_names = [metric_name for output_function_name, output_metric_names in metric_outputs
+                    for metric_name in output_metric_names]
+    query_keys, queries = get_metric_queries(intances, dimension_name, metric_names, metric_parameters)
+    cw_client = ClientPool.get_client(account, "cloudwatch", region)
+    values = get_metric_data(cw_client, queries, start_time, end_time)
+
+    metric_values = dict()
+    for query_id, intance, metric_name, statistic in query_keys:
+        metric_values[(intance, metric_name, statistic)] = values.get(query_id, [])
+
+    output_results = dict()
+    for output_function_name, output_metric_names in metric_outputs:
+        object_list = []
+        for intance in dict.fromkeys(intances):
+            # Statistics of same intance and timestamp are one datapoint
+            datapoints = dict()
+            for metric_name in output_metric_names:
+                for statistic in metric_parameters["Statistics"]:
+                    column_name = statistic if len(output_metric_names) == 1 else "{}_{}".format(metric_name, statistic)
+                    for timestamp, value in metric_values[(intance, metric_name, statistic)]:
+                        datapoints.setdefault(timestamp, {"Timestamp": timestamp})[column_name] = value
+            if not datapoints:
+                continue
+            unit = METRIC_UNITS.get(output_metric_names[0]) if len(output_metric_names) == 1 else None
+            if unit:
+                for datapoint in datapoints.values():
+                    datapoint["Unit"] = unit
+            prefix_columns = dict()
+            prefix_columns["Account"] = account
+            prefix_columns["Region"] = region
+            prefix_columns["Creation_Date"] = current_date
+            prefix_columns["service_name"] = service_name
+            prefix_columns["function_name"] = output_function_name
+            prefix_columns["instance_id"] = intance
+            result = dict()
+            result['prefix_columns'] = prefix_columns
+            result['result'] = [{'Datapoints': [datapoints[timestamp] for timestamp in sorted(datapoints)]}]
+            object_list.append(result)
+        output_results[output_function_name] = object_list
+    return output_results
+
 
 def process_result(process_config, result):
     attributes = process_config["attributes"]
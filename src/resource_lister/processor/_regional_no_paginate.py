@@ -1,12 +1,11 @@
-import concurrent.futures
 import botocore
 from resource_lister.boto_formatter.service_formatter import service_response_formatter
-from resource_lister.util.session_util import SessionHandler
+from resource_lister.util.client_pool import ClientPool
+from resource_lister.util.account_regions import AccountRegions
+from resource_lister.util.task_scheduler import TaskScheduler
 from resource_lister.util.s3_util import S3Uploader
 import logging
 import datetime
-from botocore.config import Config
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
@@ -22,39 +21,26 @@ def process(process_config):
     pagination_attributes = None
     if "pagination_attributes" in process_config.keys():
         pagination_attributes = process_config["pagination_attributes"]
-    object_list = []
-# YES: generate seperate output file for each account
+    # Skip opt-in regions which are not enabled in account
+    account_regions = AccountRegions.get_account_region_map(accounts, regions)
+    # All account x region tasks are scheduled together on shared bounded worker pool
+    tasks = [(account, region, service_name, function_name, current_date, pagination_attributes)
+             for account in accounts for region in account_regions[account]]
+    task_results = TaskScheduler.run(process_region_list_pagination, tasks)
+    # YES: generate seperate output file for each account
     if attributes["account_split"].lower() == "yes":
         for account in accounts:
-            object_list = []
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                # Start the load operations and mark each future with its URL
-                futures = {executor.submit(process_region_list_pagination, SessionHandler.get_new_session(account), account, region,
-                                           service_name, function_name, current_date, pagination_attributes): region for region in regions}
-                for future in concurrent.futures.as_completed(futures):
-                    try:
-                        object_list.append(future.result())
-                    except Exception as exc:
-                        logger.error(exc)
+            object_list = [result for task, result in task_results if task[0] == account]
             process_result(process_config, service_response_formatter(
                 service_name, function_name, object_list, attributes))
 # NO: Generate Consolidated output for all the accounts
     else:
-        for account in accounts:
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                # Start the load operations and mark each future with its URL
-                futures = {executor.submit(process_region_list_pagination, SessionHandler.get_new_session(account), account, region,
-                                           service_name, function_name, current_date, pagination_attributes): region for region in regions}
-                for future in concurrent.futures.as_completed(futures):
-                    try:
-                        object_list.append(future.result())
-                    except Exception as exc:
-                        logger.error(exc)
+        object_list = [result for task, result in task_results]
         process_result(process_config, service_response_formatter(
             service_name, function_name, object_list, attributes))
 
 
-def process_region_list_pagination(_session, account, _region, service_name, function_name, current_date, pagination_attributes):
+def process_region_list_pagination(account, _region, service_name, function_name, current_date, pagination_attributes):
     """Regional functions with no pagination"""
     result = dict()
     object_list = []
@@ -63,8 +49,7 @@ def process_region_list_pagination(_session, account, _region, service_name, fun
     prefix_columns["Region"] = _region
     prefix_columns["Creation_Date"] = current_date
     try:
-        _session_client = _session.client(
-            service_name, config=Config(region_name=_region))
+        _session_client = ClientPool.get_client(account, service_name, _region)
         if pagination_attributes:
             object_list = getattr(_session_client, function_name)(
                 **pagination_attributes)
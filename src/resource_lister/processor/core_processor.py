@@ -1,9 +1,9 @@
 import importlib
 import logging
+from resource_lister.session_mgr.service_regions import ServiceRegions
 
 logger = logging.getLogger()
 
-logger.setLevel(logging.ERROR)
 
 def process(process_config):
     """
@@ -18,6 +18,15 @@ def process(process_config):
     if not implclass or not implfunction:
         logger.error(f"Missing implclass or implfunction in process_config: {process_config}")
         raise ValueError("Missing implclass or implfunction")
+
+    # Don't schedule account x region tasks in regions where service has no endpoint
+    if process_config.get("regions"):
+        regions = ServiceRegions.filter_regions(
+            process_config["service_name"], process_config["regions"])
+        if len(regions) < len(process_config["regions"]):
+            logger.info("Skipping regions without {} endpoint : {}".format(
+                process_config["service_name"], sorted(set(process_config["regions"]) - set(regions))))
+        process_config["regions"] = regions
     
     try:
         # Try the full import path first
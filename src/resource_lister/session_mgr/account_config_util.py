@@ -4,7 +4,6 @@ import logging
 from ..util.load_config import load_account_config
 
 # Set up our logger
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 cfn_template = {
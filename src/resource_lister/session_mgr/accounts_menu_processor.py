@@ -2,7 +2,6 @@ import logging
 import resource_lister.session_mgr.account_config_util as account_config_util
 import resource_lister.util.menu_configs as acounts_menu_configs
 import resource_lister.util.menu_util as menu_util
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
@@ -7,86 +7,187 @@ Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
 
 '''
 import boto3
+import botocore.session
 import os
 import json
 import logging
+import datetime
+import threading
+import time
+from botocore.credentials import RefreshableCredentials, CredentialProvider, CredentialResolver
+from botocore.loaders import Loader
 from botocore.exceptions import ClientError
+from dateutil.parser import parse
+from dateutil.tz import tzutc
 from typing import List, Dict, Any, Optional, Sequence, Union, Callable, Set, \
     Iterator, TYPE_CHECKING, Tuple
-from ..util.load_config import load_account_config
+from ..util.load_config import load_account_config, get_cache_dir
 
 # Set up our logger
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
 
+class _UniqueSearchPaths(list):
+    """ Loader search paths shared by all sessions.
+        boto3 appends its data path on every Session construction, keep it only once
+    """
+
+    def append(self, path):
+        if path not in self:
+            super().append(path)
+
+
+class _SharedCredentialProvider(CredentialProvider):
+    """ Credential provider returning credentials object shared by all sessions of an account,
+        so refresh is visible to all of them
+    """
+    METHOD = "resource-lister-shared"
+    CANONICAL_NAME = "custom-resource-lister-shared"
+
+    def __init__(self, credentials):
+        super().__init__()
+        self.__credentials = credentials
+
+    def load(self):
+        return self.__credentials
+
+
 class IAMSessionManager():
     """ Session Manager class create sessions based on configured accounts
         in account_config.json. You can use command line utility to configure accounts
         Boto sessions are not thread safe, so session manager creates session for each request
+        Default credential chain and master role credentials are resolved once per process
+        and child account roles are assumed from the cached master session
     """
     __count = 0
+    __lock = threading.RLock()
+    __default_credentials = None
+    __is_default_credentials_resolved = False
+    __default_sts_client = None
+    __master_role_credentials = None
+    __master_sts_client = None
+    __loader = None
+    # Re-assume master role when cached credentials expire within this window.
+    # Same as botocore advisory refresh window so refreshed credentials are never stale
+    __MASTER_REFRESH_WINDOW = datetime.timedelta(minutes=15)
 
     @classmethod
     def __get_session_count(cls):
-        IAMSessionManager.__count = + 1
-        return IAMSessionManager.__count
+        with IAMSessionManager.__lock:
+            IAMSessionManager.__count = IAMSessionManager.__count + 1
+            return IAMSessionManager.__count
 
     @classmethod
-    def get_iam_session(cls, account_id) -> boto3.session.Session:
-        # Get Configuration Information
-        __session = None
+    def __to_credential_metadata(cls, credentials) -> Dict[str, Any]:
+        """ Convert sts assume_role Credentials into botocore refreshable credential metadata"""
+        return {
+            "access_key": credentials['AccessKeyId'],
+            "secret_key": credentials['SecretAccessKey'],
+            "token": credentials['SessionToken'],
+            "expiry_time": credentials['Expiration'].isoformat()
+        }
+
+    @classmethod
+    def get_loader(cls) -> Loader:
+        """ Process wide botocore loader. Loader caches parsed service models,
+            paginators and endpoint data so they are read only once for all sessions
+        """
+        if IAMSessionManager.__loader is None:
+            with IAMSessionManager.__lock:
+                if IAMSessionManager.__loader is None:
+                    search_paths = _UniqueSearchPaths()
+                    data_path = os.environ.get("AWS_DATA_PATH")
+                    if data_path:
+                        for path in data_path.split(os.pathsep):
+                            search_paths.append(os.path.expanduser(os.path.expandvars(path)))
+                    IAMSessionManager.__loader = Loader(extra_search_paths=search_paths)
+        return IAMSessionManager.__loader
+
+    @classmethod
+    def __get_default_credentials(cls):
+        """ Resolve default credential chain (env, config, instance profile) once per process"""
+        if not IAMSessionManager.__is_default_credentials_resolved:
+            with IAMSessionManager.__lock:
+                if not IAMSessionManager.__is_default_credentials_resolved:
+                    IAMSessionManager.__default_credentials = botocore.session.get_session().get_credentials()
+                    IAMSessionManager.__is_default_credentials_resolved = True
+        return IAMSessionManager.__default_credentials
+
+    @classmethod
+    def __get_default_sts_client(cls):
+        if IAMSessionManager.__default_sts_client is None:
+            with IAMSessionManager.__lock:
+                if IAMSessionManager.__default_sts_client is None:
+                    IAMSessionManager.__default_sts_client = IAMSessionManager.create_session().client('sts')
+        return IAMSessionManager.__default_sts_client
+
+    @classmethod
+    def __get_master_role_credentials(cls) -> Dict[str, Any]:
+        """ Return master role credentials, master role is assumed again only
+            when cached credentials are close to Expiration
+        """
+        with IAMSessionManager.__lock:
+            credentials = IAMSessionManager.__master_role_credentials
+            if credentials is None or \
+                    parse(credentials["expiry_time"]) - datetime.datetime.now(tzutc()) < IAMSessionManager.__MASTER_REFRESH_WINDOW:
+                _master_account = AccountConfig.get_master_account()
+                session_name = "IAMSessionManager_{}".format(
+                    IAMSessionManager.__get_session_count())
+                master_assumed_role_object = IAMSessionManager.__get_default_sts_client().assume_role(
+                    RoleArn=_master_account["master_account_role_arn"], RoleSessionName=session_name)
+                credentials = IAMSessionManager.__to_credential_metadata(
+                    master_assumed_role_object['Credentials'])
+                IAMSessionManager.__master_role_credentials = credentials
+                logger.info("Assumed master account role --> {}".format(
+                    _master_account["master_account_role_arn"]))
+            return credentials
+
+    @classmethod
+    def __get_master_sts_client(cls):
+        """ sts client used to assume child account roles
+            if master account is based on default credentials client uses default credentials
+            otherwise client uses refreshable master role credentials
+        """
+        if IAMSessionManager.__master_sts_client is None:
+            with IAMSessionManager.__lock:
+                if IAMSessionManager.__master_sts_client is None:
+                    if AccountConfig.get_master_account()["account_config_type"] == "1":
+                        IAMSessionManager.__master_sts_client = IAMSessionManager.__get_default_sts_client()
+                    else:
+                        master_credentials = RefreshableCredentials.create_from_metadata(
+                            metadata=IAMSessionManager.__get_master_role_credentials(),
+                            refresh_using=IAMSessionManager.__get_master_role_credentials,
+                            method="sts-assume-role")
+                        IAMSessionManager.__master_sts_client = IAMSessionManager.create_session(
+                            master_credentials).client('sts')
+        return IAMSessionManager.__master_sts_client
+
+    @classmethod
+    def get_iam_credentials(cls, account_id) -> Optional[Dict[str, Any]]:
+        """ Assume the role configured for account_id and return temporary credentials
+            in botocore credential metadata format (access_key, secret_key, token, expiry_time)
+            Returns None if account uses default credentials (instance profile/env)
+        """
+        credentials = None
         try:
             account = AccountConfig.get_account(account_id)
             _master_account = AccountConfig.get_master_account()
             # if master account is also present in account
             if account["IsMasterAcccount"]:
-                if _master_account["account_config_type"] == "1":
-                    __session = boto3.session.Session()
-                else:
-                    __master_account_session = boto3.session.Session()
-                    _master_sts_client = __master_account_session.client('sts')
-                    session_name = "IAMSessionManager_{}".format(
-                        IAMSessionManager.__get_session_count())
-                    master_assumed_role_object = _master_sts_client.assume_role(
-                        RoleArn=_master_account["master_account_role_arn"], RoleSessionName=session_name)
-                    role_credentials = master_assumed_role_object['Credentials']
-                    __session = boto3.Session(
-                        aws_access_key_id=role_credentials['AccessKeyId'], aws_secret_access_key=role_credentials['SecretAccessKey'], aws_session_token=role_credentials['SessionToken'])
+                if _master_account["account_config_type"] != "1":
+                    credentials = IAMSessionManager.__get_master_role_credentials()
             # Master account session is required only when it's IAM Role
             else:
-                # If master account is based on default credentials
-                sts_client = None
-                if _master_account["account_config_type"] == "1":
-                    # if account is role get session from instance profile
-                    __master_account_session = boto3.session.Session()
-                    sts_client = __master_account_session.client('sts')
-                else:
-                    # if it's IAM user first get session from Master Account IAM Role
-                    # Then get sts session for child account
-                    __master_account_session = boto3.session.Session()
-                    _master_sts_client = __master_account_session.client('sts')
-                    session_name = "IAMSessionManager_{}".format(
-                        IAMSessionManager.__get_session_count())
-                    master_assumed_role_object = _master_sts_client.assume_role(
-                        RoleArn=_master_account["master_account_role_arn"], RoleSessionName=session_name)
-                    role_credentials = master_assumed_role_object['Credentials']
-                    role__session = boto3.Session(
-                        aws_access_key_id=role_credentials['AccessKeyId'], aws_secret_access_key=role_credentials['SecretAccessKey'], aws_session_token=role_credentials['SessionToken'])
-                    sts_client = role__session.client('sts')
-
                 session_name = "IAMSessionManager_{}".format(
                     IAMSessionManager.__get_session_count())
-                assumed_role_object = sts_client.assume_role(
+                assumed_role_object = IAMSessionManager.__get_master_sts_client().assume_role(
                     RoleArn=account["role_arn"], RoleSessionName=session_name)
                 # From the response that contains the assumed role, get the temporary
                 # credentials that can be used to make subsequent API calls
-                credentials = assumed_role_object['Credentials']
-                __session = boto3.Session(
-                    aws_access_key_id=credentials['AccessKeyId'],
-                    aws_secret_access_key=credentials['SecretAccessKey'], aws_session_token=credentials['SessionToken'])
+                credentials = IAMSessionManager.__to_credential_metadata(
+                    assumed_role_object['Credentials'])
 
-            logger.info("Created new session for account --> {}".format(
+            logger.info("Created new credentials for account --> {}".format(
                 account["account_id"]))
         except ClientError as err:
             logging.error(err)
@@ -94,7 +195,30 @@ class IAMSessionManager():
                 "Couldn't create session for account %s.", account_id)
             raise
 
-        return __session
+        return credentials
+
+    @classmethod
+    def create_session(cls, credentials=None) -> boto3.session.Session:
+        """ Create boto3 session backed by given botocore credentials object.
+            Session uses default credentials if credentials is None
+            All sessions share process wide botocore loader
+        """
+        botocore_session = botocore.session.get_session()
+        botocore_session.register_component('data_loader', IAMSessionManager.get_loader())
+        if credentials is None:
+            credentials = IAMSessionManager.__get_default_credentials()
+        if credentials is not None:
+            # Resolver with only shared credentials, default chain is not walked again for each session
+            botocore_session.register_component(
+                'credential_provider', CredentialResolver([_SharedCredentialProvider(credentials)]))
+        return boto3.session.Session(botocore_session=botocore_session)
+
+    @classmethod
+    def get_iam_session(cls, account_id) -> boto3.session.Session:
+        """ New session of account backed by credentials cached in SessionHandler"""
+        # Imported here as session_util imports this module
+        from resource_lister.util.session_util import SessionHandler
+        return SessionHandler.get_new_session(account_id)
 
 
 class AccountConfig():
@@ -117,6 +241,7 @@ class AccountConfig():
             # f = open(file_path)
             # __data = json.load(f)
             __data = load_account_config()     
+            AccountConfig.__data = __data
             AccountConfig.__master_account = __data["master_account"]
             if AccountConfig.__master_account["account_id"].strip() == "":
                 raise ValueError("Please configure Master Account")
@@ -207,16 +332,66 @@ class AccountConfig():
 
 
 class Region():
-    """ This class hold the  regions"""
+    """ This class hold the  regions
+        Regions are loaded on first use from on-disk region catalog, catalog is refreshed
+        with describe_regions once it's older than RESOURCE_LISTER_REGION_CACHE_TTL seconds
+    """
     __regions = None
+    __lock = threading.Lock()
+    __CATALOG_FILE = "region_catalog.json"
+    __DEFAULT_TTL = 86400
+
+    @classmethod
+    def __get_catalog_path(cls):
+        return os.path.join(get_cache_dir(), Region.__CATALOG_FILE)
+
+    @classmethod
+    def __get_ttl(cls):
+        try:
+            return int(os.getenv("RESOURCE_LISTER_REGION_CACHE_TTL", Region.__DEFAULT_TTL))
+        except ValueError:
+            return Region.__DEFAULT_TTL
+
+    @classmethod
+    def __read_catalog(cls, master_account_id):
+        """ Return regions from catalog if catalog is present, not expired and for same master account"""
+        try:
+            with open(Region.__get_catalog_path()) as f:
+                catalog = json.load(f)
+            if catalog["master_account"] == master_account_id and \
+                    time.time() - catalog["created_at"] < Region.__get_ttl():
+                return catalog["regions"]
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.debug("Region catalog not used : {}".format(err))
+        return None
+
+    @classmethod
+    def __write_catalog(cls, master_account_id, regions):
+        catalog = {"master_account": master_account_id,
+                   "created_at": time.time(), "regions": regions}
+        try:
+            catalog_path = Region.__get_catalog_path()
+            temp_path = "{}.{}.tmp".format(catalog_path, os.getpid())
+            with open(temp_path, "w") as outfile:
+                json.dump(catalog, outfile)
+            os.replace(temp_path, catalog_path)
+        except OSError as err:
+            logger.warning("Couldn't write region catalog : {}".format(err))
 
     @classmethod
     def __load_regions(cls):
-        __session = IAMSessionManager().get_iam_session(
-            AccountConfig.get_master_account()["account_id"])
-        ec2_client = __session.client('ec2')
-        Region.__regions = [region['RegionName']
-                            for region in ec2_client.describe_regions()['Regions']]
+        with Region.__lock:
+            if Region.__regions:
+                return
+            master_account_id = AccountConfig.get_master_account()["account_id"]
+            regions = Region.__read_catalog(master_account_id)
+            if regions is None:
+                __session = IAMSessionManager().get_iam_session(master_account_id)
+                ec2_client = __session.client('ec2')
+                regions = [region['RegionName']
+                           for region in ec2_client.describe_regions()['Regions']]
+                Region.__write_catalog(master_account_id, regions)
+            Region.__regions = regions
 
     @classmethod
     def get_regions(cls):
@@ -0,0 +1,129 @@
+"""
+Service availability by region
+Index of regions where each service has an endpoint, generated from botocore endpoint data.
+Index is shipped as service_regions.json and regenerated at Docker build time with
+    python -m resource_lister.session_mgr.service_regions
+If shipped index is missing it is generated on first run and saved in cache directory
+"""
+import os
+import json
+import logging
+import threading
+from ..util.load_config import get_cache_dir
+
+logger = logging.getLogger()
+
+INDEX_FILE = "service_regions.json"
+
+
+def get_index_path():
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(dir_path, INDEX_FILE)
+
+
+def get_menu_service_names():
+    """
+    :return: sorted list of services configured in menu_config.json
+    """
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(dir_path, "..", "menu", "menu_config.json")
+    with open(file_path) as f:
+        menu_data = json.load(f)
+    return sorted({_menu["service_name"] for _menu in menu_data["menus"]})
+
+
+def build_index(service_names=None):
+    """
+    Build service and region index from botocore endpoint data for all partitions
+    Global services (iam, organizations ..) have empty region list
+    :param service_names: services to index, default is services in menu_config.json
+    :return: index dictionary
+    """
+    import botocore
+    import botocore.session
+    if service_names is None:
+        service_names = get_menu_service_names()
+    session = botocore.session.get_session()
+    services = dict()
+    all_regions = set()
+    for service_name in service_names:
+        regions = set()
+        for partition_name in session.get_available_partitions():
+            try:
+                regions.update(session.get_available_regions(service_name, partition_name))
+            except Exception as err:
+                logger.debug("No endpoint data for {} : {}".format(service_name, err))
+        services[service_name] = sorted(regions)
+        all_regions.update(regions)
+    return {"botocore_version": botocore.__version__,
+            "regions": sorted(all_regions), "services": services}
+
+
+def save_index(index, file_path=None):
+    if file_path is None:
+        file_path = get_index_path()
+    with open(file_path, "w") as outfile:
+        outfile.write(json.dumps(index, indent=4))
+    return file_path
+
+
+class ServiceRegions():
+    """ This class hold regions where each service is available"""
+    __services = None
+    __known_regions = None
+    __lock = threading.Lock()
+
+    @classmethod
+    def __load_index(cls):
+        with ServiceRegions.__lock:
+            if ServiceRegions.__services is not None:
+                return
+            index = None
+            for file_path in [get_index_path(), os.path.join(get_cache_dir(), INDEX_FILE)]:
+                try:
+                    with open(file_path) as f:
+                        index = json.load(f)
+                    break
+                except (OSError, ValueError) as err:
+                    logger.debug("Service region index {} not used : {}".format(file_path, err))
+            if index is None:
+                index = build_index()
+                try:
+                    save_index(index, os.path.join(get_cache_dir(), INDEX_FILE))
+                except OSError as err:
+                    logger.warning("Couldn't save service region index : {}".format(err))
+            ServiceRegions.__known_regions = set(index["regions"])
+            ServiceRegions.__services = {service_name: set(regions)
+                                         for service_name, regions in index["services"].items()}
+
+    @classmethod
+    def get_service_regions(cls, service_name):
+        """
+        :param service_name: example ec2
+        :return: set of regions where service has endpoint, None if service is unknown or global
+        """
+        if ServiceRegions.__services is None:
+            ServiceRegions.__load_index()
+        regions = ServiceRegions.__services.get(service_name)
+        if not regions:
+            return None
+        return regions
+
+    @classmethod
+    def filter_regions(cls, service_name, regions):
+        """
+        Remove regions where service doesn't have an endpoint.
+        Regions missing from index (launched after index was built) are kept
+        :param service_name: example ec2
+        :param regions: list of regions
+        :return: list of regions, order is preserved
+        """
+        service_regions = ServiceRegions.get_service_regions(service_name)
+        if service_regions is None:
+            return list(regions)
+        return [region for region in regions
+                if region in service_regions or region not in ServiceRegions.__known_regions]
+
+
+if __name__ == "__main__":
+    print("Service region index saved at {}".format(save_index(build_index())))
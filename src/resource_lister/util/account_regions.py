@@ -0,0 +1,136 @@
+"""
+Regions enabled per account
+Opt-in regions which are not enabled in an account fail with auth errors,
+so regional processors only schedule regions enabled in each account.
+Result is cached in memory and in account_regions.json in cache directory
+"""
+import os
+import json
+import time
+import threading
+import logging
+from botocore.exceptions import ClientError, BotoCoreError
+from resource_lister.util.client_pool import ClientPool
+from resource_lister.util.task_scheduler import TaskScheduler
+from resource_lister.util.load_config import get_cache_dir
+
+logger = logging.getLogger()
+
+ENABLED_OPT_IN_STATUS = ["opt-in-not-required", "opted-in"]
+
+
+class AccountRegions():
+    """ This class hold the regions enabled for each account"""
+    __account_regions = dict()
+    __account_locks = dict()
+    __lock = threading.Lock()
+    __CATALOG_FILE = "account_regions.json"
+    __DEFAULT_TTL = 86400
+
+    @classmethod
+    def __get_catalog_path(cls):
+        return os.path.join(get_cache_dir(), AccountRegions.__CATALOG_FILE)
+
+    @classmethod
+    def __get_ttl(cls):
+        try:
+            return int(os.getenv("RESOURCE_LISTER_REGION_CACHE_TTL", AccountRegions.__DEFAULT_TTL))
+        except ValueError:
+            return AccountRegions.__DEFAULT_TTL
+
+    @classmethod
+    def __read_catalog(cls):
+        try:
+            with open(AccountRegions.__get_catalog_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError) as err:
+            logger.debug("Account region catalog not used : {}".format(err))
+        return dict()
+
+    @classmethod
+    def __read_cached_regions(cls, account):
+        entry = AccountRegions.__read_catalog().get(account)
+        try:
+            if entry and time.time() - entry["created_at"] < AccountRegions.__get_ttl():
+                return entry["regions"]
+        except (KeyError, TypeError):
+            pass
+        return None
+
+    @classmethod
+    def __write_cached_regions(cls, account, regions):
+        # Catalog is shared by all accounts so read-modify-write under lock
+        with AccountRegions.__lock:
+            catalog = AccountRegions.__read_catalog()
+            catalog[account] = {"created_at": time.time(), "regions": regions}
+            try:
+                catalog_path = AccountRegions.__get_catalog_path()
+                temp_path = "{}.{}.tmp".format(catalog_path, os.getpid())
+                with open(temp_path, "w") as outfile:
+                    json.dump(catalog, outfile)
+                os.replace(temp_path, catalog_path)
+            except OSError as err:
+                logger.warning("Couldn't write account region catalog : {}".format(err))
+
+    @classmethod
+    def __get_account_lock(cls, account):
+        with AccountRegions.__lock:
+            if account not in AccountRegions.__account_locks:
+                AccountRegions.__account_locks[account] = threading.Lock()
+            return AccountRegions.__account_locks[account]
+
+    @classmethod
+    def __describe_enabled_regions(cls, account):
+        ec2_client = ClientPool.get_client(account, "ec2")
+        response = ec2_client.describe_regions(AllRegions=True)
+        return [region["RegionName"] for region in response["Regions"]
+                if region.get("OptInStatus") in ENABLED_OPT_IN_STATUS]
+
+    @classmethod
+    def get_enabled_regions(cls, account):
+        """
+        :param account: account id
+        :return: list of regions enabled in account, None if it couldn't be discovered
+        """
+        if account not in AccountRegions.__account_regions:
+            with AccountRegions.__get_account_lock(account):
+                if account not in AccountRegions.__account_regions:
+                    regions = AccountRegions.__read_cached_regions(account)
+                    if regions is None:
+                        try:
+                            regions = AccountRegions.__describe_enabled_regions(account)
+                            AccountRegions.__write_cached_regions(account, regions)
+                        except (ClientError, BotoCoreError) as err:
+                            # Don't cache failure, processors fall back to all regions
+                            logger.error("Couldn't get enabled regions for account {} : {}".format(
+                                account, err))
+                            return None
+                    AccountRegions.__account_regions[account] = regions
+        return AccountRegions.__account_regions[account]
+
+    @classmethod
+    def filter_regions(cls, account, regions):
+        """
+        :param account: account id
+        :param regions: regions selected for processing
+        :return: selected regions which are enabled in account, order is preserved
+        """
+        enabled_regions = AccountRegions.get_enabled_regions(account)
+        if enabled_regions is None:
+            return list(regions)
+        enabled_regions = set(enabled_regions)
+        return [region for region in regions if region in enabled_regions]
+
+    @classmethod
+    def get_account_region_map(cls, accounts, regions):
+        """
+        Discover enabled regions for all accounts concurrently
+        :param accounts: list of account ids
+        :param regions: regions selected for processing
+        :return: dictionary of account and its enabled regions
+        """
+        account_region_map = {account: list(regions) for account in accounts}
+        for task, result in TaskScheduler.run(AccountRegions.filter_regions,
+                                              [(account, regions) for account in accounts]):
+            account_region_map[task[0]] = result
+        return account_region_map
@@ -0,0 +1,67 @@
+"""
+Thread safe pool of boto3 clients keyed by (account, service, region)
+boto3 clients are thread safe, so every task of a run shares one client per key
+and reuses its open connections instead of repeating TLS handshakes
+"""
+import os
+import threading
+from botocore.config import Config
+from resource_lister.util.session_util import SessionHandler
+
+
+class ClientPool():
+    """ ClientPool hands out one boto3 client per (account, service, region)"""
+    __clients = dict()
+    __key_locks = dict()
+    __lock = threading.Lock()
+    # Same as concurrent.futures.ThreadPoolExecutor default max_workers
+    __max_pool_connections = min(32, (os.cpu_count() or 1) + 4)
+
+    @classmethod
+    def set_max_pool_connections(cls, max_pool_connections):
+        """ Size urllib3 connection pool of new clients to executor concurrency"""
+        ClientPool.__max_pool_connections = max(1, int(max_pool_connections))
+
+    @classmethod
+    def get_max_pool_connections(cls):
+        return ClientPool.__max_pool_connections
+
+    @classmethod
+    def __get_key_lock(cls, key):
+        with ClientPool.__lock:
+            if key not in ClientPool.__key_locks:
+                ClientPool.__key_locks[key] = threading.Lock()
+            return ClientPool.__key_locks[key]
+
+    @classmethod
+    def get_client(cls, account, service_name, region_name=None):
+        """
+        :param account: account id
+        :param service_name: example ec2, s3
+        :param region_name: region of client, default region is used if None
+        :return: boto3 client shared by all callers of same key
+        """
+        key = (account, service_name, region_name)
+        client = ClientPool.__clients.get(key)
+        if client is None:
+            with ClientPool.__get_key_lock(key):
+                client = ClientPool.__clients.get(key)
+                if client is None:
+                    config = Config(
+                        max_pool_connections=ClientPool.__max_pool_connections)
+                    if region_name:
+                        config = config.merge(Config(region_name=region_name))
+                    client = SessionHandler.get_new_session(account).client(
+                        service_name, config=config)
+                    ClientPool.__clients[key] = client
+        return client
+
+    @classmethod
+    def clear(cls):
+        """ Close all pooled clients"""
+        with ClientPool.__lock:
+            clients = list(ClientPool.__clients.values())
+            ClientPool.__clients = dict()
+            ClientPool.__key_locks = dict()
+        for client in clients:
+            client.close()
@@ -0,0 +1,210 @@
+"""
+Compiled config registry
+menu_config.json and all service_configs/*.json compiled into one indexed artifact,
+with json_response_required precomputed, so lookups by service, menu_index, option number
+and (service, function) are dictionary lookups and startup parses one file.
+Artifact is built at Docker build time with
+    python -m resource_lister.util.config_registry
+Artifact records fingerprint (name, size, mtime) of its source files. If it is missing or
+stale it is rebuilt on first use and saved in cache directory
+"""
+import os
+import json
+import logging
+import threading
+from .load_config import get_cache_dir
+
+logger = logging.getLogger()
+
+REGISTRY_FILE = "config_registry.json"
+REGISTRY_VERSION = 1
+
+
+def get_registry_path():
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(dir_path, REGISTRY_FILE)
+
+
+def get_menu_config_path():
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(dir_path, "..", "menu", "menu_config.json")
+
+
+def get_service_configs_dir():
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(dir_path, "..", "boto_formatter", "service_config_mgr", "service_configs")
+
+
+def get_source_files():
+    """
+    :return: list of config files compiled into registry
+    """
+    service_configs_dir = get_service_configs_dir()
+    source_files = [get_menu_config_path()]
+    for service_file in sorted(os.listdir(service_configs_dir)):
+        if service_file.endswith(".json"):
+            source_files.append(os.path.join(service_configs_dir, service_file))
+    return source_files
+
+
+def get_fingerprint():
+    """
+    Fingerprint of source files from file stats, files are not read
+    :return: fingerprint string
+    """
+    fingerprint = ["v{}".format(REGISTRY_VERSION)]
+    for file_path in get_source_files():
+        stat = os.stat(file_path)
+        fingerprint.append("{}:{}:{}".format(os.path.basename(file_path), stat.st_size,
+                                             stat.st_mtime_ns))
+    return ";".join(fingerprint)
+
+
+def process_function_details(function_details):
+    """ Add required only json_response """
+    json_response_required = dict()
+    json_response = function_details["json_response"]
+    for key in json_response.keys():
+        if json_response[key] == "required":
+            json_response_required[key] = json_response[key]
+    function_details["json_response_required"] = json_response_required
+    return function_details
+
+
+def build_registry():
+    """
+    Compile menu_config.json and service configs
+    :return: registry dictionary
+    """
+    fingerprint = get_fingerprint()
+    with open(get_menu_config_path()) as f:
+        menus = json.load(f)["menus"]
+    service_menus = dict()
+    for _menu in menus:
+        service_menus.setdefault(_menu["service_name"], []).append(_menu["menu_index"])
+    services = dict()
+    for file_path in get_source_files()[1:]:
+        with open(file_path) as f:
+            temp_data = json.load(f)
+        service_name = temp_data["service_name"]
+        services[service_name] = {"service_name": service_name}
+        for function_details in temp_data["functions"]:
+            services[service_name][function_details["function_name"]] = process_function_details(
+                function_details)
+    return {"version": REGISTRY_VERSION,
+            "fingerprint": fingerprint,
+            "menus": {_menu["menu_index"]: _menu for _menu in menus},
+            "service_menus": service_menus,
+            "service_list": sorted(service_menus.keys()),
+            "services": services}
+
+
+def save_registry(registry, file_path=None):
+    if file_path is None:
+        file_path = get_registry_path()
+    temp_path = "{}.{}.tmp".format(file_path, os.getpid())
+    with open(temp_path, "w") as outfile:
+        json.dump(registry, outfile, separators=(",", ":"))
+    os.replace(temp_path, file_path)
+    return file_path
+
+
+class ConfigRegistry():
+    """ This class hold compiled menu and service configs"""
+    __registry = None
+    __lock = threading.Lock()
+
+    @classmethod
+    def __read_registry(cls, file_path, fingerprint):
+        try:
+            with open(file_path) as f:
+                registry = json.load(f)
+            if registry.get("fingerprint") == fingerprint:
+                return registry
+            logger.debug("Config registry {} is stale".format(file_path))
+        except (OSError, ValueError) as err:
+            logger.debug("Config registry {} not used : {}".format(file_path, err))
+        return None
+
+    @classmethod
+    def __load_registry(cls):
+        with ConfigRegistry.__lock:
+            if ConfigRegistry.__registry is not None:
+                return
+            fingerprint = get_fingerprint()
+            cache_path = os.path.join(get_cache_dir(), REGISTRY_FILE)
+            registry = None
+            for file_path in [get_registry_path(), cache_path]:
+                registry = ConfigRegistry.__read_registry(file_path, fingerprint)
+                if registry is not None:
+                    break
+            if registry is None:
+                registry = build_registry()
+                try:
+                    save_registry(registry, cache_path)
+                except OSError as err:
+                    logger.warning("Couldn't save config registry : {}".format(err))
+            ConfigRegistry.__registry = registry
+
+    @classmethod
+    def get_registry(cls):
+        if ConfigRegistry.__registry is None:
+            ConfigRegistry.__load_registry()
+        return ConfigRegistry.__registry
+
+    @classmethod
+    def reload(cls):
+        """ Drop loaded registry, next lookup checks fingerprint again"""
+        with ConfigRegistry.__lock:
+            ConfigRegistry.__registry = None
+
+    @classmethod
+    def get_service_list(cls):
+        """
+        :return: sorted list of services in menu_config.json
+        """
+        return ConfigRegistry.get_registry()["service_list"]
+
+    @classmethod
+    def get_menu_item(cls, menu_index):
+        """
+        :param menu_index: example lambda_list_functions
+        :return: menu item, None if menu_index is not found
+        """
+        return ConfigRegistry.get_registry()["menus"].get(menu_index)
+
+    @classmethod
+    def get_service_menus(cls, service_name):
+        """
+        :param service_name: example lambda
+        :return: menu items of service in menu_config.json order, None if service is not found
+        """
+        registry = ConfigRegistry.get_registry()
+        menu_indexes = registry["service_menus"].get(service_name)
+        if menu_indexes is None:
+            return None
+        return [registry["menus"][menu_index] for menu_index in menu_indexes]
+
+    @classmethod
+    def get_option_menu_index(cls, service_name, option):
+        """
+        :param service_name: example lambda
+        :param option: option number starting from 1
+        :return: menu_index of option, None if option is not found
+        """
+        menu_indexes = ConfigRegistry.get_registry()["service_menus"].get(service_name, [])
+        if 1 <= option <= len(menu_indexes):
+            return menu_indexes[option - 1]
+        return None
+
+    @classmethod
+    def get_service_config(cls, service_name):
+        """
+        :param service_name: example lambda
+        :return: service config with function details, None if service is not found
+        """
+        return ConfigRegistry.get_registry()["services"].get(service_name)
+
+
+if __name__ == "__main__":
+    print("Config registry saved at {}".format(save_registry(build_registry())))
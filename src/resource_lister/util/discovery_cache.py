@@ -0,0 +1,83 @@
+"""
+Resource discovery cache for metric options
+Metric options of same resource type (EC2 instances, EBS volumes, ...) discover same resources,
+so ids discovered in an account x region are cached in memory and reused by later options
+of the process or warm Lambda container until RESOURCE_LISTER_DISCOVERY_CACHE_TTL expires.
+Options running at same time wait for discovery in progress instead of repeating it.
+"""
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger()
+
+
+class DiscoveryCache():
+    """ This class hold discovered resource ids by (account, region, resource type)"""
+    __entries = dict()
+    __in_progress = dict()
+    __lock = threading.Lock()
+    __DEFAULT_TTL = 900
+
+    @classmethod
+    def __get_ttl(cls):
+        try:
+            return int(os.getenv("RESOURCE_LISTER_DISCOVERY_CACHE_TTL", DiscoveryCache.__DEFAULT_TTL))
+        except ValueError:
+            return DiscoveryCache.__DEFAULT_TTL
+
+    @classmethod
+    def __get_cached(cls, key, ttl):
+        entry = DiscoveryCache.__entries.get(key)
+        if entry is not None and time.time() - entry[0] < ttl:
+            return entry[1]
+        return None
+
+    @classmethod
+    def __discover(cls, key, fetch_function, done):
+        """ Yield resource ids while they are discovered, cache them only if discovery completes"""
+        account, region, resource_type = key
+        resources = []
+        completed = False
+        try:
+            for resource_id in fetch_function(account, region):
+                resources.append(resource_id)
+                yield resource_id
+            completed = True
+        finally:
+            with DiscoveryCache.__lock:
+                if completed:
+                    DiscoveryCache.__entries[key] = (time.time(), resources)
+                DiscoveryCache.__in_progress.pop(key, None)
+            done.set()
+
+    @classmethod
+    def get_resources(cls, account, region, resource_type, fetch_function):
+        """
+        :param resource_type: resources sharing type share discovery, example InstanceId
+        :param fetch_function: generator of resource ids in account x region, called on cache miss
+        :return: iterator of resource ids
+        """
+        ttl = DiscoveryCache.__get_ttl()
+        if ttl <= 0:
+            return fetch_function(account, region)
+        key = (account, region, resource_type)
+        while True:
+            with DiscoveryCache.__lock:
+                resources = DiscoveryCache.__get_cached(key, ttl)
+                if resources is not None:
+                    logger.debug("Discovery cache hit {}".format(key))
+                    return iter(resources)
+                done = DiscoveryCache.__in_progress.get(key)
+                if done is None:
+                    done = threading.Event()
+                    DiscoveryCache.__in_progress[key] = done
+                    return DiscoveryCache.__discover(key, fetch_function, done)
+            # Other option is discovering, use its result or discover if it didn't complete
+            done.wait()
+
+    @classmethod
+    def clear(cls):
+        with DiscoveryCache.__lock:
+            DiscoveryCache.__entries.clear()
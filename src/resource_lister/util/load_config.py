@@ -1,9 +1,9 @@
 import os
 import json
 import logging
+import tempfile
 
 # Set up our logger
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
 
@@ -35,9 +35,23 @@ def load_config_attributes_json():
         config_json["output_to"] = 's3'
         config_json["required"] = 'no'
         config_json["account_split"] = 'no'
+        config_json["child_tables"] = str(os.getenv("child_tables", config_json.get("child_tables", "no")))
         config_json["s3_bucket"] = str(os.getenv("s3_bucket"))
     except KeyError as err:
             logger.error(
                 "Please check config.json file path or env variables is not set correctly.")
             raise err
-    return config_json
\ No newline at end of file
+    return config_json
+
+
+def get_cache_dir():
+    """
+    Directory for on-disk caches (region catalog etc.)
+    RESOURCE_LISTER_CACHE_DIR if set else OUTPUT_PATH (/tmp in Lambda) else system temp directory
+    Lambda keeps this directory for warm container invocations
+    :return: cache directory path
+    """
+    base_dir = os.getenv("RESOURCE_LISTER_CACHE_DIR") or os.getenv("OUTPUT_PATH") or tempfile.gettempdir()
+    cache_dir = os.path.join(base_dir, "resource_lister_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
@@ -31,6 +31,13 @@ account_split_config = [{
     "validation_functions": ["validate_mandatory"]
 }
 ]
+child_tables_config = [{
+    "id": "child_tables",
+    "display_prompt": "Generate list attributes like Tags as seperate child tables(yes/no)",
+    "is_mandatory": "yes",
+    "validation_functions": ["validate_mandatory"]
+}
+]
 s3_config = [{
     "id": "s3_bucket",
     "display_prompt": "S3 Bucket Name",
@@ -72,6 +79,10 @@ config_menu_config = {
                 {"display_name": "Modify S3 Bucket Name",
                  "action": "True",
                  "function_name": "modify_s3_bucket"
+                 },
+                {"display_name": "Modify  Generate child tables for list attributes",
+                 "action": "True",
+                 "function_name": "modify_child_tables"
                  }
             ]
         }
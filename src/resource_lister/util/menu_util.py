@@ -1,6 +1,5 @@
 
 import logging
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
@@ -1,15 +1,34 @@
 from datetime import datetime
 import os
-from resource_lister.util.session_util import SessionHandler
+from resource_lister.util.client_pool import ClientPool
+from resource_lister.session_mgr.iam_session_mgr import AccountConfig
 from botocore.exceptions import ClientError
 import resource_lister.menu.menu_util as menu_util
 import logging
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger()
 
 
+def get_child_table_name(file_name, function_name):
+    """
+    :param file_name: like 123456789012_ec2_describe_instances_Tags_01_01_2024_10_00_00.csv
+    :return: child table name like Tags, None for function output file
+    """
+    name = file_name.rsplit(".", 1)[0]
+    marker = "_{}_".format(function_name)
+    if marker not in name:
+        return None
+    # Generated file names end with 6 date parts
+    parts = name.split(marker, 1)[1].split("_")[:-6]
+    return "_".join(parts) if parts else None
+
+
 class S3Uploader():
     def upload_file(self, process_config, file_full_path):
+        # Child tables are written as list of files, parent file first
+        if isinstance(file_full_path, list):
+            for child_file_path in file_full_path:
+                self.upload_file(process_config, child_file_path)
+            return
         # Get full file path
         partition = "misc"
         attributes = process_config["attributes"]
@@ -25,15 +44,19 @@ class S3Uploader():
                 service_name = process_config["service_name"]
                 function_name = process_config["function_name"]
                 file_extention = file_name.split(".")[1]
+                # Child table file is named <function_name>_<child table>
+                child_table = get_child_table_name(file_name, function_name)
+                if child_table:
+                    function_name = "{}_{}".format(function_name, child_table)
                 file_name = "{}_{}_{}.{}".format(
                     service_name, function_name, datetime_object, file_extention)
                 s3key = "data/batch/{}/date={}/{}_{}.{}".format(
                     account, datetime_object, service_name, function_name, file_extention)
 
-            _session = SessionHandler.get_master_account_session()
+            master_account = AccountConfig.get_master_account()["account_id"]
             s3_bucket = menu_util.MenuData.get_attributes()["s3_bucket"]
             try:
-                s3_client = _session.client('s3')
+                s3_client = ClientPool.get_client(master_account, 's3')
                 s3_client.upload_file(file_full_path, s3_bucket, s3key)
                 print("S3: File is loaded--> {}/{}".format(s3_bucket, s3key))
                 self.clean_up(file_full_path)
@@ -1,35 +1,68 @@
+import threading
 import botocore
+from botocore.credentials import RefreshableCredentials
 from resource_lister.session_mgr.iam_session_mgr import IAMSessionManager
 from resource_lister.session_mgr.iam_session_mgr import AccountConfig
 
 
 class SessionHandler():
+    """ SessionHandler holds one set of assumed role credentials per account.
+        Credentials are refreshed by botocore shortly before Expiration and
+        concurrent callers for same account wait on single in-flight AssumeRole.
+        Boto sessions are not thread safe, so get_new_session returns new session
+        backed by shared credentials of the account.
+    """
     __session_cache = dict()
-    __master_account_session = None
+    __credential_cache = dict()
+    __account_locks = dict()
+    __lock = threading.Lock()
     __count = 0
 
     @classmethod
-    def __get_session_from_session_mgr(cls, account):
-        SessionHandler.__count = SessionHandler.__count+1
-        return IAMSessionManager.get_iam_session(account)
+    def __get_account_lock(cls, account):
+        with SessionHandler.__lock:
+            if account not in SessionHandler.__account_locks:
+                SessionHandler.__account_locks[account] = threading.Lock()
+            return SessionHandler.__account_locks[account]
 
     @classmethod
-    def get_master_account_session(cls):
-        if SessionHandler.__master_account_session is None:
-            master_account = AccountConfig.get_master_account()["account_id"]
-            SessionHandler.__master_account_session = IAMSessionManager.get_iam_session(master_account)
-        return SessionHandler.__master_account_session
+    def __get_credentials_from_session_mgr(cls, account):
+        with SessionHandler.__lock:
+            SessionHandler.__count = SessionHandler.__count+1
+        metadata = IAMSessionManager.get_iam_credentials(account)
+        # Account uses default credentials
+        if metadata is None:
+            return None
+        return RefreshableCredentials.create_from_metadata(
+            metadata=metadata,
+            refresh_using=lambda: IAMSessionManager.get_iam_credentials(account),
+            method="sts-assume-role")
 
+    @classmethod
+    def __get_credentials(cls, account):
+        if account not in SessionHandler.__credential_cache:
+            # Single flight: only first caller assumes role, others wait for result
+            with SessionHandler.__get_account_lock(account):
+                if account not in SessionHandler.__credential_cache:
+                    SessionHandler.__credential_cache[account] = SessionHandler.__get_credentials_from_session_mgr(
+                        account)
+        return SessionHandler.__credential_cache[account]
+
+    @classmethod
+    def get_master_account_session(cls):
+        master_account = AccountConfig.get_master_account()["account_id"]
+        return SessionHandler.get_session(master_account)
 
     @classmethod
     def get_session(cls, account):
         if account not in SessionHandler.__session_cache:
-            SessionHandler.__session_cache[account] = SessionHandler.__get_session_from_session_mgr(
-                account)
+            credentials = SessionHandler.__get_credentials(account)
+            with SessionHandler.__get_account_lock(account):
+                if account not in SessionHandler.__session_cache:
+                    SessionHandler.__session_cache[account] = IAMSessionManager.create_session(
+                        credentials)
         return SessionHandler.__session_cache[account]
-    
-    
+
     @classmethod
     def get_new_session(cls, account):
-        return IAMSessionManager.get_iam_session(account)
-
+        return IAMSessionManager.create_session(SessionHandler.__get_credentials(account))
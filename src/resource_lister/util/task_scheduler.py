@@ -0,0 +1,105 @@
+"""
+Process wide task scheduler
+All account x region tasks of a function are flattened into one queue and run on
+single bounded worker pool, so run time is close to slowest task instead of sum over accounts.
+Worker count is configured with RESOURCE_LISTER_MAX_WORKERS (default 32)
+"""
+import os
+import threading
+import logging
+import concurrent.futures
+from resource_lister.util.client_pool import ClientPool
+
+logger = logging.getLogger()
+
+THREAD_NAME_PREFIX = "resource_lister_task"
+
+
+class TaskScheduler():
+    """ TaskScheduler runs tasks on one shared bounded ThreadPoolExecutor"""
+    __executor = None
+    __max_workers = None
+    __lock = threading.Lock()
+    __DEFAULT_MAX_WORKERS = 32
+
+    @classmethod
+    def __read_max_workers(cls):
+        try:
+            return int(os.getenv("RESOURCE_LISTER_MAX_WORKERS", TaskScheduler.__DEFAULT_MAX_WORKERS))
+        except ValueError:
+            return TaskScheduler.__DEFAULT_MAX_WORKERS
+
+    @classmethod
+    def __init_max_workers(cls):
+        """ Read worker count on first use, caller holds __lock"""
+        if TaskScheduler.__max_workers is None:
+            TaskScheduler.__max_workers = max(1, TaskScheduler.__read_max_workers())
+            ClientPool.set_max_pool_connections(TaskScheduler.__max_workers)
+
+    @classmethod
+    def get_max_workers(cls):
+        with TaskScheduler.__lock:
+            TaskScheduler.__init_max_workers()
+            return TaskScheduler.__max_workers
+
+    @classmethod
+    def set_max_workers(cls, max_workers):
+        """ Set worker count, pooled client connections are sized to same value.
+            Takes effect for executor created after this call, same worker count keeps current executor
+        """
+        max_workers = max(1, int(max_workers))
+        with TaskScheduler.__lock:
+            if max_workers == TaskScheduler.__max_workers:
+                return
+            TaskScheduler.__max_workers = max_workers
+            ClientPool.set_max_pool_connections(max_workers)
+            if TaskScheduler.__executor is not None:
+                TaskScheduler.__executor.shutdown(wait=False)
+                TaskScheduler.__executor = None
+
+    @classmethod
+    def __get_executor(cls):
+        # Worker count and executor are set up together, so concurrent first use creates one executor
+        with TaskScheduler.__lock:
+            TaskScheduler.__init_max_workers()
+            if TaskScheduler.__executor is None:
+                TaskScheduler.__executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=TaskScheduler.__max_workers, thread_name_prefix=THREAD_NAME_PREFIX)
+            return TaskScheduler.__executor
+
+    @classmethod
+    def run(cls, func, tasks, raise_errors=False):
+        """
+        Run func for each task on shared worker pool
+        Failed tasks are logged and skipped, unless raise_errors is set
+        :param func: function to call
+        :param tasks: list of argument tuples, one tuple per call
+        :param raise_errors: raise exception of first failed task in task order once all tasks are done
+        :return: list of (task, result) for completed tasks in task order
+        """
+        tasks = list(tasks)
+        results = []
+        errors = []
+        # Task submitting tasks would wait on its own pool, run such nested tasks inline
+        if threading.current_thread().name.startswith(THREAD_NAME_PREFIX):
+            for task in tasks:
+                try:
+                    results.append((task, func(*task)))
+                except Exception as exc:
+                    if raise_errors:
+                        raise
+                    logger.error(exc)
+            return results
+        executor = TaskScheduler.__get_executor()
+        futures = [executor.submit(func, *task) for task in tasks]
+        for task, future in zip(tasks, futures):
+            try:
+                results.append((task, future.result()))
+            except Exception as exc:
+                if raise_errors:
+                    errors.append(exc)
+                else:
+                    logger.error(exc)
+        if errors:
+            raise errors[0]
+        return results